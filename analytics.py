@@ -0,0 +1,326 @@
+"""Columnar store of every graded round, for vectorized analytics
+
+Usage:
+    python analytics.py report [--days 7] [--by difficulty|pattern|round|hints] [--dir DIR]
+    python analytics.py compact [--dir DIR]    (only while no server is running)
+    python analytics.py benchmark [--rows 2000000]
+
+Each graded round becomes one fixed-width row (ATTEMPT_DTYPE): time, puzzle
+code, pattern, difficulty, round, hints used, score and one correctness
+flag per feature. Rows are buffered in memory and written in bulk, sorted by
+time, as immutable chunks in GRAPHQUEST_ANALYTICS_DIR (default: analytics):
+one directory per chunk holding one contiguous .npy file per column. Queries
+memory-map only the columns they touch and aggregate them with numpy, so
+they never parse rows one at a time. A chunk is written once CHUNK_ROWS rows
+are buffered, FLUSH_INTERVAL seconds after the first of them (by a timer, so
+rows are flushed even if no more arrive), or at exit. Rows not yet flushed
+(at most FLUSH_INTERVAL seconds' worth) are lost if the process is killed.
+"""
+import argparse
+import atexit
+import glob
+import hashlib
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import metrics
+import puzzle_codec
+from game_logic import FEATURES
+
+ANALYTICS_DIR = os.environ.get('GRAPHQUEST_ANALYTICS_DIR', 'analytics')
+CHUNK_ROWS = 4096
+FLUSH_INTERVAL = 30.0
+# Chunks smaller than this are merged by compact()
+COMPACT_ROWS = 1 << 20
+
+CODE_WIDTH = 32
+ATTEMPT_DTYPE = np.dtype(
+    [('time', 'f8'), ('code', f'S{CODE_WIDTH}'), ('pattern', 'u1'), ('difficulty', 'u1'),
+     ('round', 'u1'), ('hints', 'u1'), ('score', 'u2')]
+    + [(feature, '?') for feature in FEATURES]
+)
+GROUP_COLUMNS = ('difficulty', 'pattern', 'round', 'hints')
+
+def code_key(code):
+    """Fixed-width column value for a puzzle code (long custom codes are hashed)"""
+    if len(code) <= CODE_WIDTH:
+        return code
+    return '~' + hashlib.sha1(code.encode()).hexdigest()[:CODE_WIDTH - 1]
+
+class AttemptStore:
+    """Append-only, chunked, array-backed store of graded rounds"""
+
+    def __init__(self, directory=ANALYTICS_DIR, chunk_rows=CHUNK_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._timer = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._chunks = {}
+        self._chunk_counts = {}
+
+    def record(self, code, difficulty, round_number, hints_used, score, correct, now=None):
+        """Buffer one graded round; correct maps each feature to whether it was answered right"""
+        pattern, _ = puzzle_codec.decode(code)
+        row = (now or time.time(), code_key(code), puzzle_codec.PATTERN_IDS[pattern], difficulty,
+               round_number, hints_used, score, *(bool(correct[feature]) for feature in FEATURES))
+        with self._lock:
+            self._rows.append(row)
+            due = len(self._rows) >= self.chunk_rows
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    @metrics.timed('analytics.flush')
+    def flush(self):
+        """Write buffered rows as one chunk"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            timer, self._timer = self._timer, None
+            self._sequence += 1
+            sequence = self._sequence
+        if timer is not None:
+            timer.cancel()
+        if not rows:
+            return
+        try:
+            chunk = np.array(rows, dtype=ATTEMPT_DTYPE)
+            self._write(chunk[np.argsort(chunk['time'], kind='stable')], sequence)
+        except Exception as e:
+            metrics.record_error('analytics.flush')
+            print(f"Error writing analytics: {e}")
+
+    def _write(self, chunk, sequence):
+        """Write a time-sorted structured array as a chunk directory of column files"""
+        temp_path, path = self._write_temp(chunk, sequence)
+        os.rename(temp_path, path)
+
+    def _write_temp(self, chunk, sequence):
+        """Write a chunk under a hidden temporary name; returns (temporary path, final path)"""
+        os.makedirs(self.directory, exist_ok=True)
+        # The time range (widened to whole seconds) is in the name so queries can skip whole chunks
+        first, last = math.floor(chunk['time'].min()), math.ceil(chunk['time'].max())
+        name = f"attempts_{first}_{last}_{os.getpid()}_{sequence}"
+        temp_path = os.path.join(self.directory, f'.{name}.tmp')
+        os.makedirs(temp_path)
+        for column in ATTEMPT_DTYPE.names:
+            np.save(os.path.join(temp_path, f'{column}.npy'), np.ascontiguousarray(chunk[column]))
+        return temp_path, os.path.join(self.directory, name)
+
+    def chunk_files(self, since=None):
+        """Chunk directories, oldest first, skipping those entirely before since"""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, 'attempts_*')):
+            first, last = _time_range(path)
+            if since is None or last >= since:
+                files.append((first, path))
+        return [path for _, path in sorted(files)]
+
+    def _chunk(self, path):
+        with self._lock:
+            chunk = self._chunks.get(path)
+            if chunk is None:
+                chunk = self._chunks[path] = Chunk(path)
+        return chunk
+
+    @metrics.timed('analytics.load')
+    def load(self, columns=ATTEMPT_DTYPE.names, since=None):
+        """{column: array} of all flushed rows, optionally only from since onwards"""
+        chunks = [self._chunk(path) for path in self.chunk_files(since)]
+        starts = [chunk.start(since) for chunk in chunks]
+        return {
+            column: np.concatenate([chunk[column][start:] for chunk, start in zip(chunks, starts)]
+                                   or [np.zeros(0, dtype=ATTEMPT_DTYPE[column])])
+            for column in columns
+        }
+
+    def group_counts(self, by='difficulty', since=None):
+        """Array [attempts, correct per feature...] x group value (0-255) over flushed rows"""
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {by!r}; choose one of {', '.join(GROUP_COLUMNS)}")
+        total = np.zeros((len(FEATURES) + 1, 256), dtype=np.int64)
+        for path in self.chunk_files(since):
+            if since is None or _time_range(path)[0] >= since:
+                # Whole chunk in range: its counts never change, so compute them once
+                key = (path, by)
+                with self._lock:
+                    counts = self._chunk_counts.get(key)
+                if counts is None:
+                    counts = _count(self._chunk(path), by)
+                    with self._lock:
+                        self._chunk_counts[key] = counts
+                total += counts
+            else:
+                chunk = self._chunk(path)
+                total += _count(chunk, by, chunk.start(since))
+        return total
+
+    @metrics.timed('analytics.feature_accuracy')
+    def feature_accuracy(self, by='difficulty', since=None):
+        """{group value: {'attempts': n, feature: fraction correct, ...}} grouped by a column"""
+        counts = self.group_counts(by, since)
+        result = {}
+        for group in np.flatnonzero(counts[0]):
+            attempts = counts[0, group]
+            result[int(group)] = {'attempts': int(attempts)}
+            for i, feature in enumerate(FEATURES, 1):
+                result[int(group)][feature] = float(counts[i, group] / attempts)
+        return result
+
+    def compact(self):
+        """Merge small chunks into larger ones so queries open fewer files
+        
+        Run it only while no server uses the directory: it deletes chunks that
+        a live process may have memory-mapped or cached counts for. The merged
+        chunk is published after the small ones are deleted, so no row is ever
+        counted twice; if compaction is interrupted in between, the merged rows
+        are left in a hidden .attempts_*.tmp directory.
+        """
+        self.flush()
+        small = [path for path in self.chunk_files() if len(self._chunk(path)) < COMPACT_ROWS]
+        if len(small) < 2:
+            return 0
+        merged = np.zeros(sum(len(self._chunk(path)) for path in small), dtype=ATTEMPT_DTYPE)
+        for column in ATTEMPT_DTYPE.names:
+            merged[column] = np.concatenate([self._chunk(path)[column] for path in small])
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        temp_path, path = self._write_temp(merged[np.argsort(merged['time'], kind='stable')], sequence)
+        for old_path in small:
+            shutil.rmtree(old_path)
+            with self._lock:
+                self._chunks.pop(old_path, None)
+                for by in GROUP_COLUMNS:
+                    self._chunk_counts.pop((old_path, by), None)
+        os.rename(temp_path, path)
+        return len(small)
+
+class Chunk:
+    """One flushed chunk: its columns, memory-mapped on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self._columns = {}
+
+    def __getitem__(self, column):
+        if column not in self._columns:
+            self._columns[column] = np.load(os.path.join(self.path, f'{column}.npy'), mmap_mode='r')
+        return self._columns[column]
+
+    def __len__(self):
+        return len(self['time'])
+
+    def start(self, since):
+        """Index of the first row at or after since (rows are sorted by time)"""
+        return 0 if since is None else int(np.searchsorted(self['time'], since))
+
+def _time_range(path):
+    """(first, last) row time of a chunk, from its directory name"""
+    _, first, last = os.path.basename(path).split('_')[:3]
+    return float(first), float(last)
+
+def _count(chunk, by, start=0):
+    """Attempts and correct answers per feature for each value of a uint8 column, from row start on"""
+    keys = chunk[by][start:]
+    counts = np.zeros((len(FEATURES) + 1, 256), dtype=np.int64)
+    counts[0] = np.bincount(keys, minlength=256)
+    for i, feature in enumerate(FEATURES, 1):
+        # Weighting by the bool column counts correct answers without building a masked copy
+        counts[i] = np.bincount(keys, weights=chunk[feature][start:], minlength=256)
+    return counts
+
+STORE = AttemptStore()
+atexit.register(STORE.flush)
+
+def record_attempt(code, difficulty, round_number, hints_used, score, correct):
+    """Record one graded round in the process-wide store"""
+    try:
+        STORE.record(code, difficulty, round_number, hints_used, score, correct)
+    except Exception as e:
+        metrics.record_error('analytics.record')
+        print(f"Error recording attempt: {e}")
+
+def print_report(store, by, days):
+    since = time.time() - days * 86400 if days else None
+    accuracy = store.feature_accuracy(by, since)
+    names = {i: pattern.strip('_') for pattern, i in puzzle_codec.PATTERN_IDS.items()}
+    print(f"{by:<28} {'attempts':>9} " + ' '.join(f'{f[:10]:>10}' for f in FEATURES))
+    for group, row in accuracy.items():
+        label = names.get(group, group) if by == 'pattern' else group
+        print(f"{label!s:<28} {row['attempts']:>9} " + ' '.join(f'{row[f]:>10.1%}' for f in FEATURES))
+
+def benchmark(rows):
+    """Time a grouped accuracy query over rows synthetic attempts"""
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = AttemptStore(directory)
+        now = time.time()
+        times = np.sort(rng.uniform(now - 30 * 86400, now, rows))
+        for start in range(0, rows, COMPACT_ROWS):
+            chunk = np.zeros(min(COMPACT_ROWS, rows - start), dtype=ATTEMPT_DTYPE)
+            chunk['time'] = times[start:start + len(chunk)]
+            chunk['code'] = b'AwEGAg'
+            chunk['pattern'] = rng.integers(1, 11, len(chunk))
+            chunk['difficulty'] = rng.integers(1, 5, len(chunk))
+            chunk['round'] = rng.integers(1, 6, len(chunk))
+            chunk['hints'] = rng.integers(0, 4, len(chunk))
+            for feature in FEATURES:
+                chunk[feature] = rng.random(len(chunk)) < 0.7
+            store._write(chunk, start)
+
+        for label, since in (('all rows', None), ('last 7 days', now - 7 * 86400)):
+            start = time.perf_counter()
+            store.feature_accuracy('difficulty', since)
+            cold = (time.perf_counter() - start) * 1000
+            timings = []
+            for _ in range(10):
+                start = time.perf_counter()
+                store.feature_accuracy('difficulty', since)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"accuracy by difficulty, {label} of {rows} attempts: "
+                  f"first {cold:.1f} ms, then p50 {np.percentile(timings, 50):.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-attempt analytics")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report = subparsers.add_parser('report', help="feature accuracy grouped by a column")
+    report.add_argument('--by', default='difficulty', choices=GROUP_COLUMNS)
+    report.add_argument('--days', type=float, default=7, help="only the last N days (0 for all)")
+    report.add_argument('--dir', default=ANALYTICS_DIR)
+    compact = subparsers.add_parser('compact', help="merge small chunks")
+    compact.add_argument('--dir', default=ANALYTICS_DIR)
+    bench = subparsers.add_parser('benchmark', help="time queries over synthetic attempts")
+    bench.add_argument('--rows', type=int, default=2000000)
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        store = AttemptStore(args.dir)
+        if not store.chunk_files():
+            print(f"No attempts recorded in {args.dir}", file=sys.stderr)
+            return 1
+        print_report(store, args.by, args.days)
+    elif args.command == 'compact':
+        try:
+            print(f"Merged {AttemptStore(args.dir).compact()} chunks")
+        except OSError as e:
+            print(f"Error compacting {args.dir}: {e}", file=sys.stderr)
+            return 1
+    else:
+        benchmark(args.rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
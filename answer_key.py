@@ -0,0 +1,134 @@
+from fractions import Fraction
+from functools import lru_cache
+import math
+import re
+
+# Answers within this distance of the correct value are accepted
+TOLERANCE = 0.001
+# Feature values are floats; recover the exact fraction they came from
+MAX_DENOMINATOR = 1000
+
+NO_VALUE_ANSWERS = ('none', 'undefined', '')
+
+# Bounds on a typed number, so huge exponents or digit strings can't make Fraction slow or overflow
+MAX_NUMBER_LENGTH = 40
+MAX_EXPONENT = 20
+_NUMBER = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE]([+-]?\d+))?')
+
+def _check_decimal(text):
+    text = text.strip()
+    match = _NUMBER.fullmatch(text)
+    if not match or len(text) > MAX_NUMBER_LENGTH:
+        raise ValueError(f"Not a number: {text[:MAX_NUMBER_LENGTH]!r}")
+    if match.group(1) is not None and abs(int(match.group(1))) > MAX_EXPONENT:
+        raise ValueError(f"Exponent out of range: {text!r}")
+    return text
+
+@lru_cache(maxsize=4096)
+def parse_number(text):
+    """Parse an integer, decimal or fraction such as '-2', '0.25' or '1/3' exactly; raises ValueError"""
+    if '/' in text:
+        numerator, denominator = text.split('/')
+        return Fraction(_check_decimal(numerator)) / Fraction(_check_decimal(denominator))
+    return Fraction(_check_decimal(text))
+
+def parse_float(text):
+    """Nearest float to parse_number(text) (within an ulp for fractions), without building a Fraction"""
+    if '/' in text:
+        numerator, denominator = text.split('/')
+        return float(_check_decimal(numerator)) / float(_check_decimal(denominator))
+    return float(_check_decimal(text))
+
+@lru_cache(maxsize=4096)
+def parse_numbers(input_str):
+    """Parse comma-separated numbers; empty, 'none', 'undefined' or malformed input gives ()"""
+    if not input_str or input_str.lower().strip() in NO_VALUE_ANSWERS:
+        return ()
+
+    try:
+        return tuple(parse_number(item) for item in input_str.split(',') if item.strip())
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return ()
+
+def parse_floats(input_str):
+    """parse_numbers as floats (see parse_float)"""
+    if not input_str or input_str.lower().strip() in NO_VALUE_ANSWERS:
+        return ()
+
+    try:
+        return [parse_float(item) for item in input_str.split(',') if item.strip()]
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return ()
+
+def to_fraction(value):
+    """Exact fraction for a feature value, snapping float noise such as 0.8333333333333334 to 5/6"""
+    exact = Fraction(value)
+    nearby = exact.limit_denominator(MAX_DENOMINATOR)
+    return nearby if abs(nearby - exact) < 1e-9 else exact
+
+def bucket(value):
+    """Tolerance bucket of a value; matches can only lie in the same or an adjacent bucket"""
+    return math.floor(value / TOLERANCE)
+
+class ListKey:
+    """Answer key for a feature given as a list of x-values"""
+    __slots__ = ('display', 'values', 'exact', 'buckets')
+
+    def __init__(self, values):
+        self.display = sorted(float(v) for v in values)
+        self.values = sorted({to_fraction(v) for v in values})
+        self.exact = {v: i for i, v in enumerate(self.values)}
+        self.buckets = {}
+        for i, v in enumerate(self.values):
+            self.buckets.setdefault(bucket(v), []).append(i)
+
+    def _lookup(self, value):
+        """Position of the correct value matching an answer, or None"""
+        position = self.exact.get(value)
+        if position is not None:
+            return position
+        b = bucket(value)
+        for candidate in (b, b - 1, b + 1):
+            for i in self.buckets.get(candidate, ()):
+                if abs(self.values[i] - value) < TOLERANCE:
+                    return i
+        return None
+
+    def matches(self, user_input):
+        """Whether the answer names every correct value and nothing else"""
+        found = set()
+        for value in parse_numbers(user_input):
+            position = self._lookup(value)
+            if position is None:
+                return False
+            found.add(position)
+        return len(found) == len(self.values)
+
+class ValueKey:
+    """Answer key for a single y-value, where None means no value exists"""
+    __slots__ = ('display', 'value')
+
+    def __init__(self, value):
+        self.display = value
+        self.value = to_fraction(value) if value is not None else None
+
+    def matches(self, user_input):
+        """Whether the answer equals the value within TOLERANCE (or names its absence)"""
+        user_input = user_input.strip().lower()
+        if self.value is None:
+            return user_input in NO_VALUE_ANSWERS
+        try:
+            return abs(parse_number(user_input) - self.value) < TOLERANCE
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return False
+
+class AnswerKey:
+    """Pre-compiled correct answers for one puzzle, built once when the puzzle is generated"""
+    __slots__ = ('vertical_asymptotes', 'horizontal_asymptote', 'holes', 'x_intercepts', 'y_intercept')
+
+    def __init__(self, features):
+        self.vertical_asymptotes = ListKey(features['vertical_asymptotes'])
+        self.horizontal_asymptote = ValueKey(features['horizontal_asymptote'])
+        self.holes = ListKey([hole[0] for hole in features['holes']])
+        self.x_intercepts = ListKey(features['x_intercepts'])
+        self.y_intercept = ValueKey(features['y_intercept'])
@@ -1,21 +1,58 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
-import sympy as sp
-from sympy import symbols, apart, limit, oo, solve, factor, cancel
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime
-import json
 import os
-from game_logic import GameLogic
-from function_generator import FunctionGenerator
-from database import Database
+import secrets
+import time
+import analytics
+import classroom
+import custom_puzzle
+import daily_challenge
+import metrics
+import profiler
+import puzzle_codec
+import session_memory
+import session_trace
+
+# Heavy modules (SymPy via the generator, Plotly) are imported on first use so the
+# script itself loads quickly; init_components then pays their start-up cost once.
 
 # Initialize components
 @st.cache_resource
 def init_components():
-    return GameLogic(), FunctionGenerator(), Database()
+    from game_logic import GameLogic
+    from function_generator import FunctionGenerator
+    from database import Database
+    
+    game_logic, func_gen, db = GameLogic(), FunctionGenerator(), Database()
+    
+    # Warm-up: run every generator pattern, the plot and the grader once
+    start = time.perf_counter()
+    func_gen.warm_up()
+    func_data = func_gen.generate_function(1)
+    create_function_plot(func_data)
+    game_logic.check_answers(func_data, {
+        'vertical_asymptotes': '', 'horizontal_asymptote': '', 'holes': '', 'x_intercepts': '', 'y_intercept': ''
+    })
+    # Today's Daily Challenge, so its first player doesn't pay for it; later days are built before midnight
+    daily_challenge.get_challenge(func_gen, create_function_plot)
+    daily_challenge.schedule_prebuild(func_gen, create_function_plot)
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+    
+    # Optional Prometheus endpoint for operators
+    if os.environ.get('GRAPHQUEST_METRICS_PORT'):
+        metrics.start_http_server(int(os.environ['GRAPHQUEST_METRICS_PORT']))
+    
+    return game_logic, func_gen, db
+
+def export_metrics():
+    """Write metrics to GRAPHQUEST_METRICS_FILE, at most once every few seconds"""
+    filename = os.environ.get('GRAPHQUEST_METRICS_FILE')
+    if filename:
+        try:
+            metrics.write_prometheus(filename, min_interval=5.0)
+        except Exception as e:
+            metrics.record_error('app.export_metrics')
+            print(f"Error writing metrics: {e}")
 
 def main():
     st.set_page_config(
@@ -35,17 +72,61 @@ def main():
         st.session_state.current_round = 1
     if 'total_rounds' not in st.session_state:
         st.session_state.total_rounds = 5
-    if 'current_function' not in st.session_state:
-        st.session_state.current_function = None
+    if 'current_code' not in st.session_state:
+        st.session_state.current_code = None
     if 'hints_used' not in st.session_state:
         st.session_state.hints_used = 0
     if 'round_completed' not in st.session_state:
         st.session_state.round_completed = False
     if 'last_feedback' not in st.session_state:
         st.session_state.last_feedback = None
+    if 'seen_puzzles' not in st.session_state:
+        st.session_state.seen_puzzles = []
+    if 'advanced_mode' not in st.session_state:
+        st.session_state.advanced_mode = False
+    if 'queued_puzzles' not in st.session_state:
+        st.session_state.queued_puzzles = []
+    if 'shared_puzzle' not in st.session_state:
+        st.session_state.shared_puzzle = None
+    if 'daily_date' not in st.session_state:
+        st.session_state.daily_date = None
+    if 'custom_code' not in st.session_state:
+        st.session_state.custom_code = None
+    if 'custom_preview_limit' not in st.session_state:
+        st.session_state.custom_preview_limit = {}
+    if 'room_code' not in st.session_state:
+        st.session_state.room_code = None
+    if 'room_player' not in st.session_state:
+        st.session_state.room_player = None
+    if 'hosted_room' not in st.session_state:
+        st.session_state.hosted_room = None
+    if 'room_create_limit' not in st.session_state:
+        st.session_state.room_create_limit = {}
     
     game_logic, func_gen, db = init_components()
     
+    # A shared link (?puzzle=CODE) makes that puzzle the first round of the next game
+    if 'puzzle' in st.query_params:
+        code = st.query_params['puzzle']
+        del st.query_params['puzzle']
+        try:
+            if puzzle_codec.decode(code)[0] == custom_puzzle.CUSTOM_PATTERN:
+                # Same gate as the Create a Puzzle page: never play an answer key the exact check rejects
+                mismatches = custom_preview(code)[2]
+                if mismatches:
+                    raise ValueError(f"Unverified answer key ({', '.join(mismatches)})")
+            else:
+                func_gen.from_code(code)
+            st.session_state.shared_puzzle = code
+        except ValueError:
+            st.warning("That puzzle link is not valid.")
+    
+    # A classroom link (?room=CODE) opens the join page with the code filled in
+    if 'room' in st.query_params:
+        st.session_state.room_code_input = st.query_params['room']
+        del st.query_params['room']
+        st.session_state.game_state = 'classroom'
+    
     # Header
     st.title("🎮 Graph Quest: Rational Rampage")
     st.markdown("---")
@@ -59,6 +140,10 @@ def main():
         show_game_over(game_logic, func_gen, db)
     elif st.session_state.game_state == 'leaderboard':
         show_leaderboard(db)
+    elif st.session_state.game_state == 'custom':
+        show_custom_puzzle()
+    elif st.session_state.game_state == 'classroom':
+        show_classroom(func_gen)
 
 def show_main_menu(game_logic, func_gen, db):
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -83,30 +168,81 @@ def show_main_menu(game_logic, func_gen, db):
         - **Speed bonus** for quick answers
         """)
         
+        if st.session_state.shared_puzzle:
+            st.info(f"🔗 Shared puzzle `{st.session_state.shared_puzzle}` will be your first round.")
+        
         # Player name input
         player_name = st.text_input("Enter your name:", value=st.session_state.player_name)
+        advanced_mode = st.checkbox(
+            "🎓 Advanced mode (degree 5-10 functions in the final rounds)",
+            value=st.session_state.advanced_mode
+        )
         
         col_start, col_board = st.columns(2)
         
         with col_start:
             if st.button("🚀 Start Game", type="primary", use_container_width=True):
                 if player_name.strip():
-                    st.session_state.player_name = player_name.strip()
-                    st.session_state.game_state = 'playing'
-                    st.session_state.current_score = 0
-                    st.session_state.current_round = 1
-                    st.session_state.hints_used = 0
-                    st.session_state.round_completed = False
-                    st.session_state.last_feedback = None
-                    st.session_state.current_function = None
-                    st.rerun()
+                    start_game(player_name.strip(), advanced_mode)
                 else:
                     st.error("Please enter your name to start!")
         
         with col_board:
             if st.button("📊 Leaderboard", use_container_width=True):
                 st.session_state.game_state = 'leaderboard'
+                trace('leaderboard')
                 st.rerun()
+        
+        if st.button(f"📅 Daily Challenge ({daily_challenge.today()})", use_container_width=True,
+                     help="The same five puzzles for every player today, with its own leaderboard"):
+            if player_name.strip():
+                start_game(player_name.strip(), advanced_mode, daily_challenge.today())
+            else:
+                st.error("Please enter your name to start!")
+        
+        if st.button("✏️ Create a Puzzle", use_container_width=True,
+                     help="Type your own rational function and share it as a puzzle link"):
+            st.session_state.game_state = 'custom'
+            st.rerun()
+        
+        if st.button("🏫 Classroom Race", use_container_width=True,
+                     help="Host or join a live room where a class plays the same puzzles"):
+            st.session_state.game_state = 'classroom'
+            st.rerun()
+
+def start_game(player_name, advanced_mode, daily_date=None, room=None, event='start'):
+    """Reset the session for a new game; daily_date plays that day's Daily Challenge, room a classroom race"""
+    st.session_state.player_name = player_name
+    st.session_state.advanced_mode = advanced_mode
+    st.session_state.daily_date = daily_date
+    st.session_state.room_code = room.code if room else None
+    st.session_state.game_state = 'playing'
+    st.session_state.current_score = 0
+    st.session_state.current_round = 1
+    st.session_state.hints_used = 0
+    st.session_state.round_completed = False
+    st.session_state.last_feedback = None
+    st.session_state.current_code = None
+    st.session_state.seen_puzzles = []
+    if st.session_state.shared_puzzle and daily_date is None and room is None:
+        st.session_state.queued_puzzles.insert(0, st.session_state.shared_puzzle)
+        st.session_state.shared_puzzle = None
+    trace(event, name=player_name, advanced=advanced_mode, daily=daily_date is not None, room=room is not None)
+    st.rerun()
+
+def shared_puzzles(func_gen):
+    """The precomputed Daily Challenge or classroom room being played (None for regular games)"""
+    if st.session_state.daily_date:
+        return daily_challenge.get_challenge(func_gen, create_function_plot, st.session_state.daily_date)
+    if st.session_state.room_code:
+        return classroom.get_room(st.session_state.room_code)
+    return None
+
+def current_partition():
+    """Leaderboard partition of the game being played (None for regular games)"""
+    if st.session_state.daily_date:
+        return daily_challenge.leaderboard_partition(st.session_state.daily_date)
+    return None
 
 def show_game_interface(game_logic, func_gen, db):
     # Game header
@@ -114,12 +250,26 @@ def show_game_interface(game_logic, func_gen, db):
     with col1:
         st.metric("👤 Player", st.session_state.player_name)
     with col2:
-        st.metric("🎯 Round", f"{st.session_state.current_round}/{st.session_state.total_rounds}")
+        round_label = f"{st.session_state.current_round}/{st.session_state.total_rounds}"
+        if st.session_state.daily_date:
+            round_label += f" · 📅 {st.session_state.daily_date}"
+        st.metric("🎯 Round", round_label)
     with col3:
         st.metric("⭐ Score", st.session_state.current_score)
     
     st.markdown("---")
     
+    if st.session_state.room_code:
+        room = classroom.get_room(st.session_state.room_code)
+        if room is None:
+            # The teacher ended the race (or it expired): carry on as a regular game
+            st.warning("This classroom race has ended; your game continues on your own.")
+            st.session_state.room_code = None
+        else:
+            with st.sidebar:
+                st.markdown("### 🏁 Live Standings")
+                live_standings(room.code, limit=10)
+    
     # Check for next round button click
     if st.session_state.round_completed:
         col_next = st.columns([1, 2, 1])[1]
@@ -127,16 +277,20 @@ def show_game_interface(game_logic, func_gen, db):
             if st.session_state.current_round < st.session_state.total_rounds:
                 if st.button("➡️ Next Round", type="primary", use_container_width=True, key="next_round_btn"):
                     st.session_state.current_round += 1
-                    st.session_state.current_function = None
+                    st.session_state.current_code = None
                     st.session_state.hints_used = 0
                     st.session_state.round_completed = False
                     st.session_state.last_feedback = None
+                    trace('next')
                     st.rerun()
             else:
                 if st.button("🏁 Finish Game", type="primary", use_container_width=True, key="finish_game_btn"):
-                    # Save score to database
-                    db.save_score(st.session_state.player_name, st.session_state.current_score)
+                    # Save score to database; a classroom race is scored by its room's standings
+                    if not st.session_state.room_code:
+                        db.save_score(st.session_state.player_name, st.session_state.current_score,
+                                      partition=current_partition())
                     st.session_state.game_state = 'game_over'
+                    trace('finish')
                     st.rerun()
         
         # Show last round's feedback if available
@@ -160,23 +314,43 @@ def show_game_interface(game_logic, func_gen, db):
         return
     
     # Generate or get current function
-    if st.session_state.current_function is None:
-        difficulty = min(st.session_state.current_round, 3)  # Cap difficulty at 3
-        st.session_state.current_function = func_gen.generate_function(difficulty)
+    if st.session_state.current_code is None:
+        puzzle_set = shared_puzzles(func_gen)
+        if puzzle_set:
+            # Precomputed once per process and shared read-only by every player
+            func_data = puzzle_set.puzzles[st.session_state.current_round - 1]
+        elif st.session_state.queued_puzzles:
+            # Puzzles fixed in advance, e.g. a shared link or a replayed session
+            func_data = func_gen.from_code(st.session_state.queued_puzzles.pop(0))
+        else:
+            # Cap difficulty at 3, or at the high-degree tier in advanced mode
+            difficulty = min(st.session_state.current_round, 4 if st.session_state.advanced_mode else 3)
+            func_data = func_gen.generate_function(difficulty, exclude=st.session_state.seen_puzzles)
+        # The session keeps only the code; the puzzle itself may be evicted while it is idle
+        session_store().put(current_session_id(), func_data)
+        st.session_state.current_code = func_data['code']
+        st.session_state.seen_puzzles.append(func_data['code'])
+        trace('puzzle', round=st.session_state.current_round, code=func_data['code'])
     
-    func_data = st.session_state.current_function
+    func_data = session_store().get(current_session_id(), st.session_state.current_code)
     
     # Display function
     st.markdown(f"### Round {st.session_state.current_round}: Analyze this rational function")
     st.latex(func_data['latex'])
+    st.caption(f"Puzzle code `{func_data['code']}`: share it as a link ending in `?puzzle={func_data['code']}`")
     
     # Create two columns for graph and questions
     col_graph, col_questions = st.columns([1.2, 1])
     
     with col_graph:
         st.markdown("#### 📈 Function Graph")
-        fig = create_function_plot(func_data)
-        st.plotly_chart(fig, use_container_width=True)
+        puzzle_set = shared_puzzles(func_gen)
+        if puzzle_set:
+            fig = puzzle_set.figures[st.session_state.current_round - 1]
+        else:
+            fig = create_function_plot(func_data)
+        with metrics.timed('render_plot'):
+            st.plotly_chart(fig, use_container_width=True)
     
     with col_questions:
         st.markdown("#### 🎯 Identify the Features")
@@ -216,6 +390,15 @@ def show_game_interface(game_logic, func_gen, db):
                 
                 score, feedback = game_logic.check_answers(func_data, answers)
                 points_earned = max(0, score - (st.session_state.hints_used * 10))
+                from function_generator import PATTERN_DIFFICULTY
+                analytics.record_attempt(
+                    func_data['code'], PATTERN_DIFFICULTY.get(func_data['pattern'], 0),
+                    st.session_state.current_round, st.session_state.hints_used, score,
+                    {feature: result['correct'] for feature, result in feedback.items()}
+                )
+                room = classroom.get_room(st.session_state.room_code) if st.session_state.room_code else None
+                if room:
+                    room.standings.submit(st.session_state.room_player, st.session_state.current_round, points_earned)
                 st.session_state.current_score += points_earned
                 
                 # Store feedback for next display
@@ -227,6 +410,7 @@ def show_game_interface(game_logic, func_gen, db):
                 
                 # Mark round as completed
                 st.session_state.round_completed = True
+                trace('submit', round=st.session_state.current_round, answers=answers, score=score)
                 st.rerun()
         
         with col_hint:
@@ -234,6 +418,7 @@ def show_game_interface(game_logic, func_gen, db):
                 if st.session_state.hints_used < 3:
                     hint = game_logic.get_hint(func_data, st.session_state.hints_used)
                     st.session_state.hints_used += 1
+                    trace('hint', round=st.session_state.current_round)
                     st.info(f"💡 Hint: {hint}")
                 else:
                     st.warning("No more hints available!")
@@ -246,9 +431,15 @@ def show_game_over(game_logic, func_gen, db):
         st.markdown(f"**Final Score: {st.session_state.current_score} points**")
         
         # Show rank
-        scores = db.get_leaderboard()
-        rank = len([s for s in scores if s['score'] > st.session_state.current_score]) + 1
-        st.markdown(f"**Your Rank: #{rank}**")
+        room = classroom.get_room(st.session_state.room_code) if st.session_state.room_code else None
+        if st.session_state.daily_date:
+            st.markdown(f"**📅 Daily Challenge {st.session_state.daily_date}**")
+        if room:
+            # Live, so the rank keeps up with classmates still playing
+            live_standings(room.code)
+        else:
+            rank = db.leaderboard_snapshot().rank(st.session_state.current_score, current_partition())
+            st.markdown(f"**Your Rank: #{rank}**")
         
         # Achievement badges
         achievements = []
@@ -270,82 +461,243 @@ def show_game_over(game_logic, func_gen, db):
         
         with col_play:
             if st.button("🔄 Play Again", type="primary", use_container_width=True):
-                st.session_state.game_state = 'playing'
-                st.session_state.current_score = 0
-                st.session_state.current_round = 1
-                st.session_state.current_function = None
-                st.session_state.hints_used = 0
-                st.session_state.round_completed = False
-                st.session_state.last_feedback = None
-                st.rerun()
+                # Always a regular game: a Daily Challenge or classroom set is played once
+                start_game(st.session_state.player_name, st.session_state.advanced_mode, event='play_again')
         
         with col_board:
             if st.button("📊 Leaderboard", use_container_width=True):
                 st.session_state.game_state = 'leaderboard'
+                trace('leaderboard')
                 st.rerun()
         
         with col_menu:
             if st.button("🏠 Main Menu", use_container_width=True):
                 st.session_state.game_state = 'menu'
+                trace('menu')
                 st.rerun()
 
 def show_leaderboard(db):
     st.markdown("### 🏆 Leaderboard - Top Players")
     
-    scores = db.get_leaderboard()
+    snapshot = db.leaderboard_snapshot()
+    daily_partition = daily_challenge.leaderboard_partition(daily_challenge.today())
+    tab_all, tab_daily = st.tabs(["🏆 All Time", f"📅 Daily Challenge {daily_challenge.today()}"])
+    with tab_all:
+        show_scores(snapshot, None)
+    with tab_daily:
+        show_scores(snapshot, daily_partition)
     
-    if scores:
-        # Create leaderboard display
-        for i, score in enumerate(scores[:10], 1):
-            col1, col2, col3, col4 = st.columns([0.5, 2, 1, 1.5])
-            
-            with col1:
-                if i == 1:
-                    st.markdown("🥇")
-                elif i == 2:
-                    st.markdown("🥈")
-                elif i == 3:
-                    st.markdown("🥉")
-                else:
-                    st.markdown(f"**{i}**")
-            
-            with col2:
-                st.markdown(f"**{score['player_name']}**")
-            
-            with col3:
-                st.markdown(f"**{score['score']}** pts")
+    if st.button("🏠 Back to Menu", type="primary"):
+        st.session_state.game_state = 'menu'
+        trace('menu')
+        st.rerun()
+
+@st.cache_resource(show_spinner=False)
+def session_store():
+    """Process-wide store of each session's current puzzle, swept for idle sessions"""
+    _, func_gen, _ = init_components()
+    store = session_memory.SessionStore(func_gen.from_code,
+                                        cold_build=lambda code: func_gen.from_code(code, use_cache=False))
+    session_memory.schedule_sweeps(store)
+    return store
+
+@st.cache_resource(show_spinner=False)
+def room_expiry():
+    """Process-wide timer expiring unused classroom rooms"""
+    return classroom.schedule_expiry()
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def custom_preview(code, _limit=None):
+    """Puzzle data, figure and features failing the exact cross-check for a custom puzzle code, built once
+    
+    A build (a cache miss) spends one of the _limit preview tokens, if given, and
+    raises custom_puzzle.PreviewLimitExceeded when there are none left.
+    """
+    if _limit is not None and not custom_puzzle.allow_preview(_limit):
+        raise custom_puzzle.PreviewLimitExceeded()
+    _, func_gen, _ = init_components()
+    func_data = func_gen.from_code(code)
+    try:
+        mismatches = func_gen.cross_check(func_data)
+    except Exception as e:
+        metrics.record_error('custom_puzzle.cross_check')
+        print(f"Error cross-checking custom puzzle: {e}")
+        mismatches = ['all features']
+    if mismatches:
+        metrics.record_error('custom_puzzle.cross_check')
+    return func_data, create_function_plot(func_data), mismatches
+
+def show_custom_puzzle():
+    st.markdown("### ✏️ Create a Puzzle")
+    st.markdown(
+        "Type a rational function using `x`, whole numbers, `+ - * ^` and parentheses, "
+        "with one `/` between the numerator and the denominator, e.g. `(x-1)(x+2)/(x^2-4)`."
+    )
+    
+    text = st.text_input("f(x) =", key="custom_input", max_chars=custom_puzzle.MAX_INPUT_LENGTH)
+    if text.strip():
+        try:
+            code = custom_puzzle.puzzle_code(text)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            code = None
+        if code and code != st.session_state.custom_code:
+            # Rapid edits are rate-limited so previews can't monopolize the server;
+            # previews someone already built are free
+            try:
+                custom_preview(code, st.session_state.custom_preview_limit)
+                st.session_state.custom_code = code
+            except custom_puzzle.PreviewLimitExceeded:
+                st.warning("⏳ Too many previews at once; showing the previous one. Try again in a moment.")
+    
+    if st.session_state.custom_code:
+        code = st.session_state.custom_code
+        func_data, fig, mismatches = custom_preview(code)
+        features = func_data['features']
+        st.latex(func_data['latex'])
+        
+        col_graph, col_info = st.columns([1.2, 1])
+        with col_graph:
+            with metrics.timed('render_plot'):
+                st.plotly_chart(fig, use_container_width=True)
+        with col_info:
+            st.markdown("#### 🎯 Answer Key")
+            st.markdown(f"**Vertical Asymptotes:** {', '.join(f'{v:g}' for v in features['vertical_asymptotes']) or 'none'}")
+            ha = features['horizontal_asymptote']
+            st.markdown(f"**Horizontal Asymptote:** {'none' if ha is None else f'{ha:g}'}")
+            st.markdown(f"**Holes:** {', '.join(f'({x:g}, {y:g})' for x, y in features['holes']) or 'none'}")
+            st.markdown(f"**X-intercepts:** {', '.join(f'{v:g}' for v in features['x_intercepts']) or 'none'}")
+            y_int = features['y_intercept']
+            st.markdown(f"**Y-intercept:** {'undefined' if y_int is None else f'{y_int:g}'}")
+            st.markdown(f"**Puzzle code:** `{code}`")
+            st.caption(f"Share it as a link ending in `?puzzle={code}`")
             
-            with col4:
-                date_str = datetime.fromisoformat(score['date_played']).strftime("%m/%d/%Y %H:%M")
-                st.markdown(f"{date_str}")
+            if mismatches:
+                # Never serve an answer key that an exact check disagrees with
+                st.warning(f"⚠️ This puzzle's answer key could not be verified ({', '.join(mismatches)}), "
+                           "so it can't be played. Try an equivalent form of the function.")
+            elif st.button("▶️ Play this puzzle", type="primary", use_container_width=True):
+                st.session_state.shared_puzzle = code
+                st.session_state.game_state = 'menu'
+                st.rerun()
+    
+    if st.button("🏠 Back to Menu"):
+        st.session_state.game_state = 'menu'
+        st.rerun()
+
+def show_classroom(func_gen):
+    st.markdown("### 🏫 Classroom Race")
+    room = classroom.get_room(st.session_state.hosted_room) if st.session_state.hosted_room else None
+    
+    if room:
+        # Teacher's view of a room they created
+        st.markdown(f"Room code: **`{room.code}`**. Students join from the menu's Classroom Race button, "
+                    f"or with a link ending in `?room={room.code}`.")
+        with st.expander("📋 Puzzles in this race"):
+            for round_number, func_data in enumerate(room.puzzles, 1):
+                st.markdown(f"**Round {round_number}**")
+                st.latex(func_data['latex'])
+        live_standings(room.code)
+        if st.button("🛑 End Race"):
+            classroom.close_room(room.code)
+            st.session_state.hosted_room = None
+            st.rerun()
     else:
-        st.info("No scores recorded yet. Be the first to play!")
+        col_join, col_host = st.columns(2)
+        with col_join:
+            st.markdown("#### 🎒 Join a race")
+            room_code = st.text_input("Room code", key="room_code_input", max_chars=classroom.ROOM_CODE_LENGTH)
+            player_name = st.text_input("Your name", value=st.session_state.player_name, key="room_player_name")
+            if st.button("🚀 Join", type="primary", use_container_width=True):
+                room = classroom.get_room(room_code)
+                if not player_name.strip():
+                    st.error("Please enter your name to join!")
+                elif room is None:
+                    st.error("No live race has that code. Check it with your teacher.")
+                else:
+                    # Stable per session and name, so joining again reuses the same entry
+                    player_id = f"{current_session_id()}:{player_name.strip()}"
+                    if room.standings.join(player_id, player_name.strip()):
+                        st.session_state.room_player = player_id
+                        start_game(player_name.strip(), room.advanced, room=room)
+                    else:
+                        st.error("This race is full.")
+        with col_host:
+            st.markdown("#### 🧑‍🏫 Host a race")
+            advanced = st.checkbox("🎓 Advanced mode (degree 5-10 functions in the final rounds)", key="room_advanced")
+            if st.button("➕ Create Room", use_container_width=True):
+                if not classroom.allow_create(st.session_state.room_create_limit):
+                    st.error("❌ You're creating rooms too quickly. Wait a minute and try again.")
+                else:
+                    room_expiry()
+                    try:
+                        with st.spinner("Preparing the puzzles..."):
+                            room = classroom.create_room(func_gen, create_function_plot, advanced)
+                        st.session_state.hosted_room = room.code
+                        st.rerun()
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
     
-    if st.button("🏠 Back to Menu", type="primary"):
+    if st.button("🏠 Back to Menu", key="classroom_menu"):
         st.session_state.game_state = 'menu'
         st.rerun()
 
+@st.cache_resource(max_entries=8, show_spinner=False)
+def leaderboard_table(version, partition, _rows):
+    """One table per leaderboard snapshot and partition, shared read-only by every session"""
+    import pandas as pd
+    return pd.DataFrame(list(_rows), columns=['Rank', 'Player', 'Score', 'Played'])
+
+def show_scores(snapshot, partition):
+    """Render a leaderboard partition as a single scrollable table"""
+    rows = snapshot.rows(partition)
+    if rows:
+        with metrics.timed('render_leaderboard'):
+            st.dataframe(leaderboard_table(snapshot.version, partition, rows),
+                         hide_index=True, use_container_width=True, height=400)
+    else:
+        st.info("No scores recorded yet. Be the first to play!")
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def standings_table(room_code, version, limit, _rows):
+    """One table per version of a room's standings, shared read-only by every client polling it"""
+    import pandas as pd
+    return pd.DataFrame(list(_rows), columns=['Rank', 'Player', 'Score', 'Rounds'])
+
+@st.fragment(run_every=classroom.POLL_INTERVAL)
+def live_standings(room_code, limit=None):
+    """A room's standings, re-polled every POLL_INTERVAL seconds without rerunning the page"""
+    room = classroom.get_room(room_code)
+    if room is None:
+        st.info("This race has ended.")
+        return
+    snapshot = room.standings.snapshot()
+    rows = snapshot.rows if limit is None else snapshot.rows[:limit]
+    st.caption(f"🏫 Room {room.code} · {len(snapshot.rows)} players")
+    with metrics.timed('render_standings'):
+        st.dataframe(standings_table(room.code, snapshot.version, limit, rows),
+                     hide_index=True, use_container_width=True)
+    if st.session_state.room_code == room.code:
+        st.markdown(f"**Your Rank: #{room.standings.rank(st.session_state.room_player)}**")
+
+@metrics.timed('create_function_plot')
 def create_function_plot(func_data):
     """Create an interactive plot of the rational function"""
+    import plotly.graph_objects as go
+    import sympy as sp
+    
     try:
-        x = symbols('x')
+        x = sp.symbols('x')
         expr = func_data['expression']
         
         # Create x values for plotting
         x_vals = np.linspace(-10, 10, 1000)
-        y_vals = []
         
-        # Evaluate function at each point
-        for x_val in x_vals:
-            try:
-                y_val = float(expr.subs(x, x_val))
-                # Limit y values to reasonable range
-                if abs(y_val) > 50:
-                    y_vals.append(np.nan)
-                else:
-                    y_vals.append(y_val)
-            except:
-                y_vals.append(np.nan)
+        # Evaluate function at all points at once (high-degree functions make per-point subs slow)
+        with np.errstate(all='ignore'):
+            y_vals = np.asarray(sp.lambdify(x, expr, 'numpy')(x_vals), dtype=float) * np.ones_like(x_vals)
+        # Limit y values to reasonable range
+        y_vals[~np.isfinite(y_vals) | (np.abs(y_vals) > 50)] = np.nan
         
         # Create plot
         fig = go.Figure()
@@ -414,6 +766,7 @@ def create_function_plot(func_data):
         
     except Exception as e:
         # Fallback simple plot
+        metrics.record_error('app.create_function_plot')
         fig = go.Figure()
         fig.add_annotation(
             text="Graph generation error",
@@ -422,5 +775,48 @@ def create_function_plot(func_data):
         )
         return fig
 
+def current_session_id():
+    """Random id of this browser session, kept in its session state
+
+    Streamlit's own session id is not used: every AppTest instance (load
+    tests, replays) shares the same one.
+    """
+    if 'session_token' not in st.session_state:
+        st.session_state.session_token = secrets.token_hex(8)
+    return st.session_state.session_token
+
+def trace(event, **data):
+    """Record a session event if GRAPHQUEST_TRACE_FILE is set"""
+    if session_trace.ENABLED:
+        session_trace.record(current_session_id(), event, **data)
+
+def describe_session():
+    """Tags identifying the current puzzle and game state, for profiles and traces"""
+    code = st.session_state.get('current_code')
+    session_id = current_session_id()
+    # Never rebuilds an evicted puzzle or keeps an idle session's puzzle alive
+    func_data = session_store().peek(session_id)
+    if func_data and func_data['code'] != code:
+        func_data = None
+    pattern, params = puzzle_codec.decode(code) if code else (None, None)
+    return {
+        'session': session_id,
+        'game_state': st.session_state.get('game_state'),
+        'current_round': st.session_state.get('current_round'),
+        'current_score': st.session_state.get('current_score'),
+        'hints_used': st.session_state.get('hints_used'),
+        'round_completed': st.session_state.get('round_completed'),
+        'pattern': pattern,
+        'params': params,
+        'code': code,
+        'latex': func_data.get('latex') if func_data else None,
+        'puzzle_bytes': session_store().session_bytes(session_id),
+        'room': st.session_state.get('room_code'),
+    }
+
 if __name__ == "__main__":
-    main()
+    try:
+        with metrics.timed('rerun'), profiler.capture(st.session_state, st.query_params, describe_session):
+            main()
+    finally:
+        export_metrics()
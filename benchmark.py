@@ -0,0 +1,351 @@
+"""Benchmarks for Graph Quest
+
+Usage:
+    python benchmark.py run [--output FILE] [--repeat N] [--seed S] [--sizes 1000,100000,1000000]
+    python benchmark.py compare BASELINE CURRENT [--threshold PCT]
+    python benchmark.py high-degree [--repeat N] [--seed S] [--with-sympy]
+
+run times every FunctionGenerator pattern, _analyze_function, create_function_plot,
+GameLogic.check_answers and every Database operation at each stored-score size,
+reporting p50/p95/p99 latency and peak traced memory, and saves the results as
+JSON. compare diffs two result files and exits non-zero on regressions.
+
+high-degree times whole numeric-path puzzle builds for every degree from 2 to 10, on
+inputs drawn by the _advanced_high_degree sampler from degree 5 up (synthetic
+ones with a hole and a complex pair below), and exits non-zero when the p99
+build time at any degree exceeds ANALYSIS_BUDGET_MS.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from function_generator import ANALYSIS_BUDGET_MS, DIFFICULTY_PATTERNS, FunctionGenerator, clear_feature_cache
+import custom_puzzle
+from numeric_analysis import poly_from_roots, poly_multiply
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+def percentile(samples, q):
+    """q-th percentile of a list of timings"""
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+def measure(fn, repeat, setup=None):
+    """Time fn over repeat runs, then trace one extra run for peak memory
+
+    setup, if given, is called before every run (untimed) and its return value
+    is passed to fn as positional arguments.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'n': repeat,
+        'mean_ms': float(np.mean(timings)),
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'p99_ms': percentile(timings, 99),
+        'peak_kb': peak / 1024,
+    }
+
+def bench_patterns(func_gen, repeat, seed):
+    """Time building a puzzle with each generator pattern, cold and from a cached code"""
+    results = {}
+    for patterns in DIFFICULTY_PATTERNS.values():
+        for pattern in patterns:
+            rng = random.Random(seed)
+            if pattern in func_gen.parameter_index:
+                draw = lambda: func_gen._sample_parameters(pattern, rng)
+            else:
+                draw = lambda: func_gen._sample_high_degree_parameters(rng)
+            def sample():
+                # Time the full analysis, not a feature cache hit
+                clear_feature_cache()
+                return (draw(),)
+            results[f'pattern/{pattern}'] = measure(
+                lambda params: func_gen.build_function(pattern, params), repeat, sample
+            )
+            code = func_gen.build_function(pattern, draw())['code']
+            results[f'from_code/{pattern}'] = measure(lambda: func_gen.from_code(code), repeat)
+    return results
+
+def sample_puzzles(func_gen, seed, per_difficulty=5):
+    """A fixed, seeded mix of puzzles across every difficulty"""
+    rng = random.Random(seed)
+    return [func_gen.generate_function(d, rng=rng) for d in DIFFICULTY_PATTERNS for _ in range(per_difficulty)]
+
+def bench_analysis(func_gen, puzzles, repeat):
+    """Time the symbolic feature analysis on a fixed puzzle mix"""
+    from sympy.core.cache import clear_cache
+    cycle = iter(puzzles * (repeat + 1))
+    def setup():
+        # Generation already analyzed these puzzles; start from a cold SymPy cache
+        clear_cache()
+        func_data = next(cycle)
+        return func_data['original_numerator'], func_data['original_denominator'], func_data['expression']
+    return {'analyze_function': measure(func_gen._analyze_function, repeat, setup)}
+
+def bench_plot(puzzles, repeat):
+    """Time figure construction on a fixed puzzle mix"""
+    from app import create_function_plot
+    cycle = iter(puzzles * (repeat + 1))
+    return {'create_function_plot': measure(create_function_plot, repeat, lambda: (next(cycle),))}
+
+def bench_grading(puzzles, repeat, seed):
+    """Time check_answers with a mix of right, wrong and malformed answers"""
+    from game_logic import GameLogic
+    game_logic = GameLogic()
+    rng = random.Random(seed)
+    cycle = iter(puzzles * (repeat + 1))
+
+    def setup():
+        func_data = next(cycle)
+        features = func_data['features']
+        answers = {
+            'vertical_asymptotes': ", ".join(map(str, features['vertical_asymptotes'])),
+            'horizontal_asymptote': rng.choice(['none', '1', '1/3', str(features['horizontal_asymptote'])]),
+            'holes': rng.choice(['none', ", ".join(str(h[0]) for h in features['holes'])]),
+            'x_intercepts': rng.choice(['0', '2, -1/2', 'abc']),
+            'y_intercept': rng.choice(['undefined', '0.5', str(features['y_intercept'])]),
+        }
+        return func_data, answers
+    return {'check_answers': measure(game_logic.check_answers, repeat, setup)}
+
+def write_scores(filename, size, seed):
+    """Write a leaderboard file holding size seeded scores"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    scores = [{
+        'player_name': f'player{rng.randrange(max(1, size // 10))}',
+        'score': rng.randrange(0, 501, 10),
+        'date_played': (start + timedelta(seconds=i)).isoformat()
+    } for i in range(size)]
+    with open(filename, 'w') as f:
+        json.dump(scores, f, indent=2)
+
+def bench_database(sizes, seed):
+    """Time every Database operation at each stored-score size"""
+    from database import Database
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f'leaderboard_{size}.json')
+            write_scores(filename, size, seed)
+            db = Database(filename)
+            # Fewer repetitions for large files; each call reads (and may rewrite) the whole file
+            repeat = max(3, min(20, 2000000 // max(size, 1)))
+            operations = {
+                'load_scores': lambda: db._load_scores(),
+                'get_leaderboard': lambda: db.get_leaderboard(),
+                'leaderboard_snapshot': lambda: db.leaderboard_snapshot(),
+                'get_player_best_score': lambda: db.get_player_best_score('player1'),
+                'get_player_stats': lambda: db.get_player_stats('player1'),
+                'save_score': lambda: db.save_score('benchmark', 250),
+                'export_data': lambda: db.export_data(os.path.join(directory, 'export.json')),
+            }
+            for name, operation in operations.items():
+                results[f'database/{name}@{size}'] = measure(operation, repeat)
+
+            # Clearing is destructive, so restore the file before every run
+            results[f'database/clear_leaderboard@{size}'] = measure(
+                lambda: db.clear_leaderboard(), repeat=3,
+                setup=lambda: write_scores(filename, size, seed) or ()
+            )
+    return results
+
+def run_suite(args):
+    """Run every benchmark section and save the results"""
+    func_gen = FunctionGenerator()
+    func_gen.warm_up()
+    puzzles = sample_puzzles(func_gen, args.seed)
+    sizes = [int(s) for s in args.sizes.split(',')] if args.sizes else list(DEFAULT_SIZES)
+
+    results = {}
+    sections = [
+        ('patterns', lambda: bench_patterns(func_gen, args.repeat, args.seed)),
+        ('analysis', lambda: bench_analysis(func_gen, puzzles, args.repeat)),
+        ('plot', lambda: bench_plot(puzzles, args.repeat)),
+        ('grading', lambda: bench_grading(puzzles, args.repeat * 10, args.seed)),
+        ('database', lambda: bench_database(sizes, args.seed)),
+    ]
+    for name, section in sections:
+        print(f"Running {name}...", file=sys.stderr)
+        results.update(section())
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'sizes': sizes,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<52} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak KB':>10}")
+    for name, r in results.items():
+        print(f"{name:<52} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['peak_kb']:>10.0f}")
+    print(f"Saved results to {args.output}")
+
+def compare(args):
+    """Diff two result files; exit non-zero if any p50 or p95 regressed past the threshold"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'benchmark':<52} {'base p50':>10} {'new p50':>10} {'change':>8} {'p95 chg':>8}")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:<52} {'only in ' + ('current' if name in current else 'baseline'):>38}")
+            continue
+        old, new = baseline[name], current[name]
+        changes = {
+            key: (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            for key in ('p50_ms', 'p95_ms')
+        }
+        flag = ''
+        if max(changes.values()) > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<52} {old['p50_ms']:>10.3f} {new['p50_ms']:>10.3f} "
+              f"{changes['p50_ms']:>+7.1f}% {changes['p95_ms']:>+7.1f}%{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold}%")
+        sys.exit(1)
+
+def random_rational(rng, degree):
+    """Integer coefficients of a rational function with a degree-n numerator, one hole and a complex pair"""
+    # The first denominator root is shared with the numerator: that factor cancels into the hole
+    den_roots = rng.sample(range(-6, 7), max(degree - 2, 1))
+    num_roots = den_roots[:1] + rng.sample([r for r in range(-9, 10) if r not in den_roots], degree - 1)
+    num_coeffs = poly_from_roots(num_roots, rng.choice((1, 2, -1)))
+    den_coeffs = poly_multiply(poly_from_roots(den_roots), [1, 0, rng.randint(1, 4)])
+    return num_coeffs, den_coeffs
+
+# Degrees below what _advanced_high_degree draws are timed on random_rational inputs
+SAMPLER_MIN_DEGREE = 5
+
+def high_degree_inputs(func_gen, rng, repeat):
+    """{degree: [(pattern, params), ...]} with repeat puzzles per degree from 2 to 10
+
+    Degrees 5-10 are drawn with the _advanced_high_degree sampler itself and
+    grouped by the larger of the numerator and denominator degrees; lower
+    degrees are random_rational functions entered as custom puzzles.
+    """
+    inputs = {degree: [(custom_puzzle.CUSTOM_PATTERN,
+                        custom_puzzle.to_params(*custom_puzzle.normalize(*random_rational(rng, degree))))
+                       for _ in range(repeat)]
+              for degree in range(2, SAMPLER_MIN_DEGREE)}
+    inputs.update({degree: [] for degree in range(SAMPLER_MIN_DEGREE, 11)})
+    # The lowest sampler degree is rare (both sides must be degree 5), so cap the draws
+    for _ in range(2000 * repeat):
+        params = func_gen._sample_high_degree_parameters(rng)
+        degree = max(len(c) for c in func_gen._high_degree_coefficients(params)) - 1
+        if len(inputs[degree]) < repeat:
+            inputs[degree].append(('_advanced_high_degree', params))
+        if all(len(v) == repeat for v in inputs.values()):
+            break
+    return inputs
+
+def bench_high_degree(repeat, seed, with_sympy=False):
+    """Time whole numeric puzzle builds (and optionally SymPy's analysis) per degree; return rows of results"""
+    rng = random.Random(seed)
+    func_gen = FunctionGenerator()
+    # Untimed first builds of each kind pay for lazy imports and set-up
+    func_gen.build_function(custom_puzzle.CUSTOM_PATTERN, (1, 1, -1, 1, 0, 1))
+    func_gen.build_function('_advanced_high_degree', func_gen._sample_high_degree_parameters(random.Random(-1)))
+    rows = []
+    for degree, inputs in high_degree_inputs(func_gen, rng, repeat).items():
+        numeric_ms, sympy_ms = [], []
+        for i, (pattern, params) in enumerate(inputs):
+            # Cold feature cache, as for a newly drawn puzzle
+            clear_feature_cache()
+            start = time.perf_counter()
+            func_data = func_gen.build_function(pattern, params)
+            numeric_ms.append((time.perf_counter() - start) * 1000)
+
+            if with_sympy and i < max(1, repeat // 20):
+                start = time.perf_counter()
+                func_gen._analyze_function(func_data['original_numerator'], func_data['original_denominator'],
+                                           func_data['expression'])
+                sympy_ms.append((time.perf_counter() - start) * 1000)
+
+        rows.append({
+            'degree': degree,
+            'source': 'sampler' if degree >= SAMPLER_MIN_DEGREE else 'synthetic',
+            'n': len(numeric_ms),
+            'p50_ms': percentile(numeric_ms, 50),
+            'p99_ms': percentile(numeric_ms, 99),
+            'sympy_p50_ms': percentile(sympy_ms, 50) if sympy_ms else None,
+        })
+    return rows
+
+def high_degree(args):
+    """Report numeric analysis time per degree against the budget"""
+    rows = bench_high_degree(args.repeat, args.seed, args.with_sympy)
+
+    print(f"High-degree numeric analysis (budget {ANALYSIS_BUDGET_MS} ms)")
+    print(f"{'degree':>6} {'inputs':>9} {'n':>5} {'p50 ms':>9} {'p99 ms':>9} {'sympy p50 ms':>13}")
+    for row in rows:
+        sympy_col = f"{row['sympy_p50_ms']:.2f}" if row['sympy_p50_ms'] is not None else "-"
+        print(f"{row['degree']:>6} {row['source']:>9} {row['n']:>5} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+              f"{sympy_col:>13}")
+
+    over_budget = [row['degree'] for row in rows if row['p99_ms'] > ANALYSIS_BUDGET_MS]
+    if over_budget:
+        print(f"Over budget at degree(s): {', '.join(map(str, over_budget))}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph Quest benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the full benchmark suite")
+    run_parser.add_argument('--output', default='bench_results.json')
+    run_parser.add_argument('--repeat', type=int, default=30, help="timed runs per benchmark")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--sizes', help="comma-separated stored-score counts for the database benchmarks")
+    run_parser.set_defaults(handler=run_suite)
+
+    compare_parser = commands.add_parser('compare', help="diff two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help="allowed slowdown in percent")
+    compare_parser.set_defaults(handler=compare)
+
+    degree_parser = commands.add_parser('high-degree', help="numeric analysis time per degree")
+    degree_parser.add_argument('--repeat', type=int, default=200, help="puzzles per degree")
+    degree_parser.add_argument('--seed', type=int, default=0)
+    degree_parser.add_argument('--with-sympy', action='store_true', help="also time the SymPy analysis for comparison")
+    degree_parser.set_defaults(handler=high_degree)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Live classroom races: a room of players on the same puzzles, with live standings
+
+Usage:
+    python classroom.py benchmark [--players 200] [--polls 20]
+
+A teacher creates a room; its puzzles and figures are generated once and
+shared read-only by every player, like the Daily Challenge. Players join
+with the room's code. Each graded round is submitted to the room's
+Standings, which keeps players in rank order as scores arrive (nothing is
+re-read or re-sorted) and bumps a version number. Clients poll snapshot(),
+which is rebuilt at most once per version and shared by all of them.
+
+Rooms live in memory in one process, so a class must play on a single
+server process. Only a player's first submission for each round counts.
+Unused rooms are expired by a timer, and each session may only create a
+few rooms in a burst, since creating one generates and plots its puzzles.
+"""
+import argparse
+import random
+import secrets
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import custom_puzzle
+import metrics
+from database import MEDALS
+
+ROOM_ROUNDS = 5
+ROOM_CODE_LENGTH = 5
+# No 0/O or 1/I, so codes read aloud or copied from a board aren't mistyped
+ROOM_CODE_CHARS = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+# Rooms unused for this long are removed
+ROOM_TTL = 4 * 3600
+# Seconds between sweeps for expired rooms
+EXPIRY_INTERVAL = 300
+MAX_ROOMS = 200
+MAX_PLAYERS = 500
+# Seconds between standings polls of each client
+POLL_INTERVAL = 2.0
+# Room creation limit per session: a burst of CREATE_BURST, then one per CREATE_INTERVAL seconds
+CREATE_BURST = 3
+CREATE_INTERVAL = 60.0
+
+class _Player:
+    __slots__ = ('name', 'score', 'rounds', 'reached')
+
+    def __init__(self, name, now):
+        self.name = name
+        self.score = 0
+        self.rounds = set()
+        self.reached = now
+
+    def key(self, player_id):
+        # Higher score first, then whoever reached it first
+        return (-self.score, self.reached, player_id)
+
+class StandingsSnapshot:
+    """Ranked (rank, player, score, rounds played) rows of one version of a room's standings"""
+    __slots__ = ('version', 'rows')
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+
+class Standings:
+    """Players of a room in rank order, updated incrementally as rounds are submitted"""
+
+    def __init__(self, rounds=ROOM_ROUNDS, max_players=MAX_PLAYERS):
+        self.rounds = rounds
+        self.max_players = max_players
+        self.version = 0
+        self._players = {}
+        self._order = []
+        self._snapshot = StandingsSnapshot(0, ())
+        self._lock = threading.Lock()
+
+    def join(self, player_id, name, now=None):
+        """Add a player with no points; False if the room is full"""
+        with self._lock:
+            if player_id in self._players:
+                return True
+            if len(self._players) >= self.max_players:
+                return False
+            player = self._players[player_id] = _Player(name, time.monotonic() if now is None else now)
+            insort(self._order, player.key(player_id))
+            self.version += 1
+        return True
+
+    def submit(self, player_id, round_number, points, now=None):
+        """Add a graded round's points; False if the player is unknown or already submitted that round"""
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is None or round_number in player.rounds:
+                return False
+            del self._order[bisect_left(self._order, player.key(player_id))]
+            player.score += points
+            player.rounds.add(round_number)
+            player.reached = time.monotonic() if now is None else now
+            insort(self._order, player.key(player_id))
+            self.version += 1
+        return True
+
+    def rank(self, player_id):
+        """1-based rank of a player (None if not in the room)"""
+        with self._lock:
+            player = self._players.get(player_id)
+            return bisect_left(self._order, player.key(player_id)) + 1 if player else None
+
+    def __len__(self):
+        return len(self._players)
+
+    def snapshot(self):
+        """Current standings, rebuilt only if a player joined or submitted since the last one"""
+        snapshot = self._snapshot
+        hit = snapshot.version == self.version
+        metrics.record_cache('classroom_standings', hit)
+        if hit:
+            return snapshot
+        with self._lock:
+            if self._snapshot.version != self.version:
+                rows = tuple(
+                    (MEDALS[i - 1] if i <= len(MEDALS) else str(i), self._players[player_id].name,
+                     self._players[player_id].score, f'{len(self._players[player_id].rounds)}/{self.rounds}')
+                    for i, (_, _, player_id) in enumerate(self._order, 1)
+                )
+                self._snapshot = StandingsSnapshot(self.version, rows)
+            return self._snapshot
+
+class Room:
+    """One live race: its shared puzzles and figures and its standings"""
+    __slots__ = ('code', 'puzzles', 'figures', 'advanced', 'standings', 'last_used')
+
+    def __init__(self, code, puzzles, figures, advanced):
+        self.code = code
+        self.puzzles = tuple(puzzles)
+        self.figures = tuple(figures)
+        self.advanced = advanced
+        self.standings = Standings(len(self.puzzles))
+        self.last_used = time.monotonic()
+
+_rooms = {}
+_lock = threading.Lock()
+
+def _new_code():
+    while True:
+        code = ''.join(secrets.choice(ROOM_CODE_CHARS) for _ in range(ROOM_CODE_LENGTH))
+        if code not in _rooms:
+            return code
+
+def _expire(now):
+    for code in [code for code, room in _rooms.items() if now - room.last_used > ROOM_TTL]:
+        del _rooms[code]
+
+def expire_rooms(now=None):
+    """Remove rooms unused for ROOM_TTL seconds"""
+    with _lock:
+        _expire(time.monotonic() if now is None else now)
+
+def _start_timer(delay, function):
+    timer = threading.Timer(delay, function)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+def schedule_expiry(interval=EXPIRY_INTERVAL):
+    """Expire unused rooms every interval seconds"""
+    def sweep():
+        try:
+            expire_rooms()
+        except Exception as e:
+            metrics.record_error('classroom.expire')
+            print(f"Error expiring rooms: {e}")
+        _start_timer(interval, sweep)
+
+    return _start_timer(interval, sweep)
+
+def allow_create(state, now=None):
+    """Token-bucket check for creating one room; state is a per-session dict"""
+    return custom_puzzle.take_token(state, CREATE_BURST, CREATE_INTERVAL, now)
+
+@metrics.timed('classroom.create_room')
+def create_room(func_gen, plot, advanced=False, rng=None):
+    """Generate and plot a new room's puzzles once; raises ValueError if too many rooms are live"""
+    rng = rng or random.Random()
+    puzzles, codes = [], []
+    for round_number in range(1, ROOM_ROUNDS + 1):
+        # Same difficulty curve as a regular game
+        func_data = func_gen.generate_function(min(round_number, 4 if advanced else 3), exclude=codes, rng=rng)
+        puzzles.append(func_data)
+        codes.append(func_data['code'])
+    figures = [plot(func_data) for func_data in puzzles]
+
+    with _lock:
+        _expire(time.monotonic())
+        if len(_rooms) >= MAX_ROOMS:
+            raise ValueError("Too many live rooms right now; try again later")
+        code = _new_code()
+        room = _rooms[code] = Room(code, puzzles, figures, advanced)
+    return room
+
+def get_room(code):
+    """The live room with this code (case-insensitive), or None"""
+    room = _rooms.get((code or '').strip().upper())
+    if room is not None:
+        room.last_used = time.monotonic()
+    return room
+
+def close_room(code):
+    """End a race: the room and its standings are dropped"""
+    with _lock:
+        _rooms.pop(code, None)
+
+def benchmark(players, polls):
+    """Time submissions and snapshot polls of one room with many simultaneous players"""
+    standings = Standings(max_players=players)
+    submit_ms, poll_ms = [], []
+
+    def play(player):
+        rng = random.Random(player)
+        player_id = secrets.token_hex(8)
+        standings.join(player_id, f'player{player}')
+        for round_number in range(1, ROOM_ROUNDS + 1):
+            start = time.perf_counter()
+            standings.submit(player_id, round_number, rng.randrange(0, 501, 10))
+            submit_ms.append((time.perf_counter() - start) * 1000)
+            for _ in range(polls // ROOM_ROUNDS):
+                start = time.perf_counter()
+                standings.snapshot()
+                poll_ms.append((time.perf_counter() - start) * 1000)
+                time.sleep(rng.uniform(0, 0.001))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(players, 64)) as pool:
+        list(pool.map(play, range(players)))
+    elapsed = time.perf_counter() - start
+    for label, timings in (('submit', submit_ms), ('poll', poll_ms)):
+        print(f"{label:<7} {len(timings):>7} calls  p50 {np.percentile(timings, 50):.3f} ms  "
+              f"p99 {np.percentile(timings, 99):.3f} ms")
+    print(f"{players} players, {standings.version} standings versions in {elapsed:.2f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Classroom race standings")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench = subparsers.add_parser('benchmark', help="simulate many players in one room")
+    bench.add_argument('--players', type=int, default=200)
+    bench.add_argument('--polls', type=int, default=20, help="standings polls per player")
+    args = parser.parse_args()
+    if args.players < 1 or args.polls < 0:
+        parser.error("--players must be at least 1 and --polls not negative")
+    benchmark(args.players, args.polls)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Teacher-authored puzzles: a small, safe parser for ratios of polynomials in x
+
+Accepts integers, x, +, -, * (or implicit multiplication), ^ (or **) with a
+small integer exponent, parentheses and a single top-level '/' separating the
+numerator from the denominator, e.g. "(x-1)(x+2)/(x^2-4)" or "2x^2-3x+1 / x-3".
+Input goes straight to integer coefficient lists (highest power first); nothing
+is ever evaluated as Python or passed to sympify. Length, degree and
+coefficient limits bound the work any input can cause.
+"""
+import re
+import time
+from functools import lru_cache
+from math import gcd
+import puzzle_codec
+
+CUSTOM_PATTERN = '_custom'
+MAX_INPUT_LENGTH = 120
+MAX_DEGREE = 10
+MAX_COEFFICIENT = 10000
+
+# Preview rate limit per session: a burst of PREVIEW_BURST, then one per PREVIEW_INTERVAL seconds
+PREVIEW_BURST = 5
+PREVIEW_INTERVAL = 1.0
+
+_TOKEN = re.compile(r'\s*(?:(\d+)|(x)|(\*\*|[-+*/^()]))')
+_PREFIX = re.compile(r'^\s*(?:f\s*\(\s*x\s*\)|y)\s*=')
+
+def _trim(poly):
+    """Drop leading zero coefficients (keeping at least one)"""
+    i = 0
+    while i < len(poly) - 1 and poly[i] == 0:
+        i += 1
+    return poly[i:]
+
+def _check(poly):
+    poly = _trim(poly)
+    if len(poly) - 1 > MAX_DEGREE:
+        raise ValueError(f"Degree is limited to {MAX_DEGREE}")
+    if any(abs(c) > MAX_COEFFICIENT for c in poly):
+        raise ValueError(f"Coefficients are limited to ±{MAX_COEFFICIENT}")
+    return poly
+
+def _add(a, b, sign=1):
+    if len(a) < len(b):
+        a = [0] * (len(b) - len(a)) + a
+    else:
+        b = [0] * (len(a) - len(b)) + b
+    return _check([p + sign * q for p, q in zip(a, b)])
+
+def _multiply(a, b):
+    if len(a) + len(b) - 2 > MAX_DEGREE and any(a) and any(b):
+        raise ValueError(f"Degree is limited to {MAX_DEGREE}")
+    result = [0] * (len(a) + len(b) - 1)
+    for i, p in enumerate(a):
+        for j, q in enumerate(b):
+            result[i + j] += p * q
+    return _check(result)
+
+class _Parser:
+    """Recursive-descent parser producing coefficient lists"""
+
+    def __init__(self, text):
+        self.tokens = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match:
+                raise ValueError(f"Unexpected character {text[position:].strip()[:1]!r}")
+            number, variable, symbol = match.groups()
+            if number is not None:
+                if len(number) > len(str(MAX_COEFFICIENT)):
+                    raise ValueError(f"Coefficients are limited to ±{MAX_COEFFICIENT}")
+                self.tokens.append(('number', int(number)))
+            elif variable:
+                self.tokens.append(('x', None))
+            else:
+                self.tokens.append(('^' if symbol == '**' else symbol, None))
+            position = match.end()
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            found = self.peek() or 'end of input'
+            raise ValueError(f"Expected {kind!r} but found {found!r}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token[1]
+
+    def ratio(self):
+        numerator = self.sum()
+        denominator = [1]
+        if self.peek() == '/':
+            self.take('/')
+            denominator = self.sum()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()!r} (use one '/' between numerator and denominator)")
+        return numerator, denominator
+
+    def sum(self):
+        sign = 1
+        if self.peek() in ('+', '-'):
+            sign = -1 if self.peek() == '-' else 1
+            self.take(self.peek())
+        result = _multiply([sign], self.term())
+        while self.peek() in ('+', '-'):
+            operator = self.peek()
+            self.take(operator)
+            result = _add(result, self.term(), -1 if operator == '-' else 1)
+        return result
+
+    def term(self):
+        result = self.factor()
+        # Explicit '*' or implicit multiplication such as 2x or (x-1)(x+2)
+        while self.peek() in ('*', 'number', 'x', '('):
+            if self.peek() == '*':
+                self.take('*')
+            result = _multiply(result, self.factor())
+        return result
+
+    def factor(self):
+        base = self.atom()
+        if self.peek() == '^':
+            self.take('^')
+            exponent = self.take('number')
+            if exponent > MAX_DEGREE:
+                raise ValueError(f"Exponents are limited to {MAX_DEGREE}")
+            result = [1]
+            for _ in range(exponent):
+                result = _multiply(result, base)
+            return result
+        return base
+
+    def atom(self):
+        kind = self.peek()
+        if kind == 'number':
+            return _check([self.take('number')])
+        if kind == 'x':
+            self.take('x')
+            return [1, 0]
+        if kind == '(':
+            self.take('(')
+            inner = self.sum()
+            self.take(')')
+            return inner
+        raise ValueError(f"Expected a number, x or '(' but found {kind or 'end of input'!r}")
+
+def normalize(numerator, denominator):
+    """Divide out the common integer factor and make the denominator's leading coefficient positive"""
+    divisor = 0
+    for c in numerator + denominator:
+        divisor = gcd(divisor, c)
+    if denominator[0] < 0:
+        divisor = -divisor
+    return [c // divisor for c in numerator], [c // divisor for c in denominator]
+
+@lru_cache(maxsize=1024)
+def parse(text):
+    """(numerator, denominator) integer coefficient tuples for an input; raises ValueError"""
+    if len(text) > MAX_INPUT_LENGTH:
+        raise ValueError(f"Input is limited to {MAX_INPUT_LENGTH} characters")
+    if not text.strip():
+        raise ValueError("Enter a function such as (x-1)(x+2)/(x^2-4)")
+    numerator, denominator = _Parser(_PREFIX.sub('', text.lower())).ratio()
+    if not any(denominator):
+        raise ValueError("The denominator must not be zero")
+    if not any(numerator):
+        raise ValueError("The numerator must not be zero")
+    numerator, denominator = normalize(numerator, denominator)
+    return tuple(numerator), tuple(denominator)
+
+def to_params(numerator, denominator):
+    """Puzzle parameters for a custom function: (numerator degree, *numerator, *denominator)"""
+    return (len(numerator) - 1, *numerator, *denominator)
+
+def from_params(params):
+    """(numerator, denominator) coefficient tuples from puzzle parameters; raises ValueError"""
+    if not params or not 0 <= params[0] <= MAX_DEGREE or len(params) < params[0] + 3:
+        raise ValueError(f"Invalid custom puzzle parameters: {params}")
+    numerator, denominator = params[1:params[0] + 2], params[params[0] + 2:]
+    if (len(denominator) - 1 > MAX_DEGREE or not numerator[0] or not denominator[0]
+            or any(abs(c) > MAX_COEFFICIENT for c in params[1:])
+            or (list(numerator), list(denominator)) != normalize(list(numerator), list(denominator))):
+        raise ValueError(f"Invalid custom puzzle parameters: {params}")
+    return numerator, denominator
+
+def puzzle_code(text):
+    """The shareable puzzle code for an input; raises ValueError"""
+    return puzzle_codec.encode(CUSTOM_PATTERN, to_params(*parse(text)))
+
+class PreviewLimitExceeded(Exception):
+    """A session asked for more uncached previews than allow_preview lets through"""
+
+def take_token(state, burst, interval, now=None):
+    """Token-bucket check: a burst of burst, then one per interval seconds; state is a per-session dict"""
+    now = time.monotonic() if now is None else now
+    tokens = min(burst, state.get('tokens', burst) + (now - state.get('time', now)) / interval)
+    state['time'] = now
+    if tokens < 1:
+        state['tokens'] = tokens
+        return False
+    state['tokens'] = tokens - 1
+    return True
+
+def allow_preview(state, now=None):
+    """Token-bucket check for one uncached preview; state is a per-session dict"""
+    return take_token(state, PREVIEW_BURST, PREVIEW_INTERVAL, now)
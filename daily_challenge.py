@@ -0,0 +1,92 @@
+"""Daily Challenge: one date-seeded set of puzzles shared by every player
+
+The set for a date is generated from a seed derived from the date alone, so
+every process produces the same puzzles. It is built and plotted once per
+process and then served read-only to all sessions: the puzzle data and
+figures must not be modified by callers.
+"""
+import random
+import threading
+from datetime import date, datetime, timedelta
+import metrics
+
+DAILY_ROUNDS = 5
+# Same difficulty curve as a regular game
+DAILY_DIFFICULTIES = tuple(min(round_number, 3) for round_number in range(1, DAILY_ROUNDS + 1))
+# Build tomorrow's set this long before midnight
+PREBUILD_LEAD = timedelta(minutes=5)
+
+class DailyChallenge:
+    """The precomputed puzzles and figures of one day's challenge"""
+    __slots__ = ('date', 'puzzles', 'figures')
+
+    def __init__(self, challenge_date, puzzles, figures):
+        self.date = challenge_date
+        self.puzzles = tuple(puzzles)
+        self.figures = tuple(figures)
+
+    @property
+    def partition(self):
+        return leaderboard_partition(self.date)
+
+def today():
+    """Today's challenge date as an ISO string"""
+    return date.today().isoformat()
+
+def leaderboard_partition(challenge_date):
+    """Leaderboard partition holding the scores of one day's challenge"""
+    return f'daily-{challenge_date}'
+
+_challenges = {}
+_lock = threading.Lock()
+
+@metrics.timed('daily_challenge.build')
+def build_challenge(func_gen, plot, challenge_date):
+    """Generate and plot the puzzles for a date (deterministic for a given date)"""
+    rng = random.Random(f'graphquest-daily-{challenge_date}')
+    puzzles, codes = [], []
+    for difficulty in DAILY_DIFFICULTIES:
+        func_data = func_gen.generate_function(difficulty, exclude=codes, rng=rng)
+        puzzles.append(func_data)
+        codes.append(func_data['code'])
+    return DailyChallenge(challenge_date, puzzles, [plot(func_data) for func_data in puzzles])
+
+def get_challenge(func_gen, plot, challenge_date=None):
+    """The challenge for a date (default today), built on first use in this process"""
+    challenge_date = challenge_date or today()
+    challenge = _challenges.get(challenge_date)
+    metrics.record_cache('daily_challenge', challenge is not None)
+    if challenge is None:
+        # One session builds it; others arriving meanwhile wait instead of duplicating the work
+        with _lock:
+            challenge = _challenges.get(challenge_date)
+            if challenge is None:
+                challenge = build_challenge(func_gen, plot, challenge_date)
+                # Keep yesterday's set for games that started before midnight
+                for old_date in sorted(_challenges)[:-1]:
+                    del _challenges[old_date]
+                _challenges[challenge_date] = challenge
+    return challenge
+
+def _start_timer(delay, function, *args):
+    timer = threading.Timer(delay, function, args)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+def schedule_prebuild(func_gen, plot):
+    """Build tomorrow's challenge shortly before midnight, and again every day after"""
+    now = datetime.now()
+    tomorrow = now.date() + timedelta(days=1)
+    delay = max(0.0, (datetime.combine(tomorrow, datetime.min.time()) - PREBUILD_LEAD - now).total_seconds())
+
+    def prebuild():
+        try:
+            get_challenge(func_gen, plot, tomorrow.isoformat())
+        except Exception as e:
+            metrics.record_error('daily_challenge.prebuild')
+            print(f"Error building daily challenge: {e}")
+        # Wait until after midnight so the next run schedules the following day
+        _start_timer(PREBUILD_LEAD.total_seconds() * 2, schedule_prebuild, func_gen, plot)
+
+    return _start_timer(delay, prebuild)
@@ -1,21 +1,60 @@
 import json
 import os
+import threading
+from bisect import bisect_left
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import metrics
+
+# Rows kept per partition in a leaderboard snapshot
+SNAPSHOT_ROWS = 500
+MEDALS = ('🥇', '🥈', '🥉')
+
+class LeaderboardSnapshot:
+    """Ranked, display-formatted leaderboards of one version of the score file, shared read-only"""
+    __slots__ = ('version', '_rows', '_negated_scores')
+
+    def __init__(self, version, scores: List[Dict], limit: int = SNAPSHOT_ROWS):
+        self.version = version
+        partitions = {}
+        for score in scores:
+            partitions.setdefault(score.get('partition'), []).append(score)
+        self._rows = {}
+        self._negated_scores = {}
+        for partition, entries in partitions.items():
+            entries.sort(key=lambda x: (-x['score'], x['date_played']))
+            self._negated_scores[partition] = [-s['score'] for s in entries]
+            self._rows[partition] = tuple(
+                (MEDALS[i - 1] if i <= len(MEDALS) else str(i), s['player_name'], s['score'],
+                 datetime.fromisoformat(s['date_played']).strftime("%m/%d/%Y %H:%M"))
+                for i, s in enumerate(entries[:limit], 1)
+            )
+
+    def rows(self, partition: Optional[str] = None) -> Tuple[Tuple[str, str, int, str], ...]:
+        """(rank, player, score, date) rows of a partition, highest score first"""
+        return self._rows.get(partition, ())
+
+    def rank(self, score: int, partition: Optional[str] = None) -> int:
+        """1 + the number of scores in a partition higher than score"""
+        return bisect_left(self._negated_scores.get(partition, []), -score) + 1
 
 class Database:
     def __init__(self, filename="leaderboard.json"):
         self.filename = filename
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
         self._ensure_file_exists()
     
+    @metrics.timed('database.ensure_file_exists')
     def _ensure_file_exists(self):
         """Create the JSON file if it doesn't exist"""
         if not os.path.exists(self.filename):
             with open(self.filename, 'w') as f:
                 json.dump([], f)
     
-    def save_score(self, player_name: str, score: int) -> None:
-        """Save a player's score to the database"""
+    @metrics.timed('database.save_score')
+    def save_score(self, player_name: str, score: int, partition: Optional[str] = None) -> None:
+        """Save a player's score to the database (optionally to a separate leaderboard partition)"""
         try:
             # Load existing scores
             scores = self._load_scores()
@@ -26,6 +65,8 @@ class Database:
                 'score': score,
                 'date_played': datetime.now().isoformat()
             }
+            if partition is not None:
+                new_score['partition'] = partition
             
             # Add to scores
             scores.append(new_score)
@@ -34,12 +75,17 @@ class Database:
             self._save_scores(scores)
             
         except Exception as e:
+            metrics.record_error('database.save_score')
             print(f"Error saving score: {e}")
     
-    def get_leaderboard(self, limit: int = 50) -> List[Dict]:
-        """Get the leaderboard sorted by score (highest first)"""
+    @metrics.timed('database.get_leaderboard')
+    def get_leaderboard(self, limit: int = 50, partition: Optional[str] = None) -> List[Dict]:
+        """Get the leaderboard sorted by score (highest first)
+        
+        Only scores saved to the given partition are included; None is the main leaderboard.
+        """
         try:
-            scores = self._load_scores()
+            scores = [s for s in self._load_scores() if s.get('partition') == partition]
             
             # Sort by score (descending) then by date (most recent first)
             sorted_scores = sorted(
@@ -51,9 +97,40 @@ class Database:
             return sorted_scores[:limit]
             
         except Exception as e:
+            metrics.record_error('database.get_leaderboard')
             print(f"Error loading leaderboard: {e}")
             return []
     
+    def version(self):
+        """Identifies the current contents of the score file (one stat call)"""
+        try:
+            stat = os.stat(self.filename)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except OSError:
+            return None
+
+    @metrics.timed('database.leaderboard_snapshot')
+    def leaderboard_snapshot(self) -> LeaderboardSnapshot:
+        """Pre-formatted leaderboards of every partition, rebuilt only when the score file changes"""
+        version = self.version()
+        snapshot = self._snapshot
+        hit = snapshot is not None and version is not None and snapshot.version == version
+        metrics.record_cache('leaderboard_snapshot', hit)
+        if not hit:
+            # Sessions arriving during a rebuild wait for it instead of parsing the file again
+            with self._snapshot_lock:
+                snapshot = self._snapshot
+                if snapshot is None or version is None or snapshot.version != version:
+                    try:
+                        snapshot = LeaderboardSnapshot(version, self._load_scores())
+                    except Exception as e:
+                        metrics.record_error('database.leaderboard_snapshot')
+                        print(f"Error building leaderboard: {e}")
+                        snapshot = LeaderboardSnapshot(None, [])
+                    self._snapshot = snapshot
+        return snapshot
+
+    @metrics.timed('database.get_player_best_score')
     def get_player_best_score(self, player_name: str) -> int:
         """Get a player's best score"""
         try:
@@ -62,9 +139,11 @@ class Database:
             return max(player_scores) if player_scores else 0
             
         except Exception as e:
+            metrics.record_error('database.get_player_best_score')
             print(f"Error getting player best score: {e}")
             return 0
     
+    @metrics.timed('database.get_player_stats')
     def get_player_stats(self, player_name: str) -> Dict:
         """Get comprehensive stats for a player"""
         try:
@@ -90,34 +169,42 @@ class Database:
             }
             
         except Exception as e:
+            metrics.record_error('database.get_player_stats')
             print(f"Error getting player stats: {e}")
             return {}
     
+    @metrics.timed('database.load_scores')
     def _load_scores(self) -> List[Dict]:
         """Load scores from JSON file"""
         try:
             with open(self.filename, 'r') as f:
                 return json.load(f)
         except Exception as e:
+            metrics.record_error('database.load_scores')
             print(f"Error loading scores: {e}")
             return []
     
+    @metrics.timed('database.save_scores')
     def _save_scores(self, scores: List[Dict]) -> None:
         """Save scores to JSON file"""
         try:
             with open(self.filename, 'w') as f:
                 json.dump(scores, f, indent=2)
         except Exception as e:
+            metrics.record_error('database.save_scores')
             print(f"Error saving scores: {e}")
     
+    @metrics.timed('database.clear_leaderboard')
     def clear_leaderboard(self) -> None:
         """Clear all scores (admin function)"""
         try:
             with open(self.filename, 'w') as f:
                 json.dump([], f)
         except Exception as e:
+            metrics.record_error('database.clear_leaderboard')
             print(f"Error clearing leaderboard: {e}")
     
+    @metrics.timed('database.export_data')
     def export_data(self, export_filename: str = None) -> str:
         """Export data to a new file for backup"""
         if export_filename is None:
@@ -130,5 +217,6 @@ class Database:
                 json.dump(scores, f, indent=2)
             return export_filename
         except Exception as e:
+            metrics.record_error('database.export_data')
             print(f"Error exporting data: {e}")
             return ""
@@ -1,192 +1,525 @@
 import sympy as sp
-from sympy import symbols, factor, expand, apart, limit, oo, solve, cancel, Poly
+from sympy import symbols, solve, cancel, Poly
 import random
-from fractions import Fraction
+import threading
+import time
+from collections import OrderedDict
+from itertools import product
+from math import gcd
+import custom_puzzle
+import metrics
+import puzzle_codec
+from answer_key import AnswerKey
+from numeric_analysis import analyze_rational, cancel_common, poly_from_roots, poly_multiply
+
+# Each pattern declares the integer ranges its parameters are drawn from and the
+# constraint a parameter tuple must satisfy. Every valid tuple is indexed once, so
+# sampling is a single uniform draw and never produces a degenerate puzzle.
+PARAMETER_SPACES = {
+    # f(x) = k/(x-a)
+    '_simple_vertical_asymptote': (
+        {'a': range(-5, 6), 'k': (1, 2, 3, -1, -2)},
+        lambda a, k: a != 0,
+    ),
+    # f(x) = (ax + b)/(cx + d), no common factor and not a rescaled duplicate
+    '_simple_horizontal_asymptote': (
+        {'a': range(1, 4), 'b': range(-5, 6), 'c': range(1, 4), 'd': range(-5, 6)},
+        lambda a, b, c, d: b * c != a * d and gcd(gcd(a, b), gcd(c, d)) == 1,
+    ),
+    # f(x) = (x-a)(x-b)/((x-a)(x-c)), hole at a and VA at c
+    '_simple_with_hole': (
+        {'a': range(-3, 4), 'b': range(-4, 5), 'c': range(-4, 5)},
+        lambda a, b, c: len({a, b, c}) == 3,
+    ),
+    # f(x) = (ax + b)/((x-c)(x-d)), numerator root is not a pole
+    '_medium_multiple_asymptotes': (
+        {'a': range(1, 4), 'b': range(-3, 4), 'c': range(-3, 4), 'd': range(-3, 4)},
+        lambda a, b, c, d: c < d and a * c + b != 0 and a * d + b != 0,
+    ),
+    # f(x) = (x-a)(x-b)/((x-c)(x-d)), no common factors
+    '_medium_with_intercepts': (
+        {'a': range(-2, 3), 'b': range(-2, 3), 'c': range(-3, 4), 'd': range(-3, 4)},
+        lambda a, b, c, d: a <= b and c < d and not {a, b} & {c, d},
+    ),
+    # f(x) = (ax^2 + bx + c)/(dx + e), numerator does not vanish at the pole
+    '_medium_oblique_asymptote': (
+        {'a': range(1, 3), 'b': range(-3, 4), 'c': range(-3, 4), 'd': range(1, 3), 'e': range(-3, 4)},
+        lambda a, b, c, d, e: (a * e * e - b * e * d + c * d * d != 0
+                               and gcd(gcd(gcd(a, b), gcd(c, d)), e) == 1),
+    ),
+    # f(x) = (x-a)(x-b)(x-c)/((x-d)(x-e)(x-a)), single hole at a and two VAs
+    '_complex_multiple_features': (
+        {'a': range(-2, 3), 'b': range(-3, 4), 'c': range(-3, 4), 'd': range(-3, 4), 'e': range(-3, 4)},
+        lambda a, b, c, d, e: b < c and d < e and len({a, b, c, d}) == 4 and len({a, b, c, e}) == 4,
+    ),
+    # f(x) = (p2 x^2 + p1 x + p0)/(q2 x^2 + q1 x + q0), denominator of degree 1 or 2
+    '_complex_high_degree': (
+        {'p2': range(1, 3), 'p1': range(-2, 3), 'p0': range(-2, 3),
+         'q2': range(0, 3), 'q1': range(-2, 3), 'q0': range(-2, 3)},
+        lambda p2, p1, p0, q2, q1, q0: ((q2 != 0 or q1 > 0)
+                                        and not (q2 != 0 and p2 * q1 == p1 * q2 and p2 * q0 == p0 * q2)
+                                        and gcd(gcd(gcd(p2, p1), gcd(p0, q2)), gcd(q1, q0)) == 1),
+    ),
+    # One of a fixed set of hand-picked functions
+    '_complex_with_parameters': (
+        {'variant': range(3)},
+        lambda variant: True,
+    ),
+}
+
+DIFFICULTY_PATTERNS = {
+    1: ('_simple_vertical_asymptote', '_simple_horizontal_asymptote', '_simple_with_hole'),
+    2: ('_medium_multiple_asymptotes', '_medium_with_intercepts', '_medium_oblique_asymptote'),
+    3: ('_complex_multiple_features', '_complex_high_degree', '_complex_with_parameters'),
+    4: ('_advanced_high_degree',),
+}
+MAX_DIFFICULTY = max(DIFFICULTY_PATTERNS)
+PATTERN_DIFFICULTY = {pattern: d for d, patterns in DIFFICULTY_PATTERNS.items() for pattern in patterns}
+
+# Hard budget for building one generated high-degree puzzle (expressions, LaTeX and
+# numeric analysis). A draw over budget is discarded and redrawn; after
+# BUDGET_REDRAWS overruns the round falls back to the tier below
+ANALYSIS_BUDGET_MS = 5.0
+BUDGET_REDRAWS = 2
+ANALYSIS_BUDGET_OVERRUNS = metrics.REGISTRY.register(metrics.Counter(
+    'graphquest_analysis_budget_overruns_total', f'Generated high-degree puzzles discarded for taking over {ANALYSIS_BUDGET_MS} ms'))
+ANALYSIS_BUDGET_FALLBACKS = metrics.REGISTRY.register(metrics.Counter(
+    'graphquest_analysis_budget_fallbacks_total', 'High-degree rounds served from the tier below after repeated overruns'))
+
+# Relative tolerance when cross-checking numeric features against SymPy
+CROSS_CHECK_TOL = 1e-6
+
+# Features and answer keys of recently built puzzles, keyed by puzzle code
+FEATURE_CACHE_SIZE = 4096
+
+# Bounds on decoded _advanced_high_degree parameters, matching what the sampler draws
+HIGH_DEGREE_MAX_ROOTS = 10
+HIGH_DEGREE_MAX_ROOT = 9
+
+_parameter_index = None
+
+def _factored_latex(roots, lead=1):
+    """LaTeX for lead * prod(x - r), e.g. 2 x \\left(x - 3\\right)"""
+    factors = ['x' if r == 0 else f'\\left(x {"-" if r > 0 else "+"} {abs(r)}\\right)' for r in roots]
+    prefix = {1: '', -1: '-'}.get(lead, f'{lead} ')
+    return (prefix + ' '.join(factors)) if factors else str(lead)
+
+def _expanded_latex(coeffs):
+    """LaTeX for a polynomial from its coefficients (highest power first), e.g. 2 x^{2} - 3 x + 1"""
+    degree = len(coeffs) - 1
+    terms = []
+    for i, c in enumerate(coeffs):
+        if c == 0:
+            continue
+        power = degree - i
+        variable = '' if power == 0 else 'x' if power == 1 else f'x^{{{power}}}'
+        body = str(abs(c)) if not variable else variable if abs(c) == 1 else f'{abs(c)} {variable}'
+        sign = ('- ' if c < 0 else '+ ') if terms else ('-' if c < 0 else '')
+        terms.append(sign + body)
+    return ' '.join(terms) or '0'
+
+def build_parameter_index():
+    """Enumerate every valid parameter tuple of every pattern (computed once per process)"""
+    global _parameter_index
+    if _parameter_index is None:
+        index = {}
+        for pattern, (ranges, constraint) in PARAMETER_SPACES.items():
+            tuples = [values for values in product(*ranges.values()) if constraint(*values)]
+            index[pattern] = (tuples, {values: i for i, values in enumerate(tuples)})
+        _parameter_index = index
+    return _parameter_index
+
+_feature_cache = OrderedDict()
+_feature_cache_lock = threading.Lock()
+
+def _cached_analysis(code):
+    """(features, answer_key) for a puzzle code if it was analyzed recently, else None"""
+    with _feature_cache_lock:
+        entry = _feature_cache.get(code)
+        if entry is not None:
+            _feature_cache.move_to_end(code)
+    metrics.record_cache('features', entry is not None)
+    return entry
+
+def _cache_analysis(code, features, answer_key):
+    with _feature_cache_lock:
+        _feature_cache[code] = (features, answer_key)
+        if len(_feature_cache) > FEATURE_CACHE_SIZE:
+            _feature_cache.popitem(last=False)
+
+def clear_feature_cache():
+    """Forget all cached analyses (e.g. so benchmarks time the analysis itself)"""
+    with _feature_cache_lock:
+        _feature_cache.clear()
 
 class FunctionGenerator:
     def __init__(self):
         self.x = symbols('x')
-        
-    def generate_function(self, difficulty=1):
-        """Generate a rational function based on difficulty level"""
-        if difficulty == 1:
-            return self._generate_simple_function()
-        elif difficulty == 2:
-            return self._generate_medium_function()
-        else:
-            return self._generate_complex_function()
+        self.parameter_index = build_parameter_index()
+        
+    @metrics.timed('generate_function')
+    def generate_function(self, difficulty=1, exclude=None, rng=None):
+        """Generate a rational function based on difficulty level
+        
+        exclude is a collection of codes of puzzles already seen, e.g. earlier
+        rounds of the same game; those are never produced again.
+        """
+        rng = rng or random
+        patterns = DIFFICULTY_PATTERNS[min(max(difficulty, 1), MAX_DIFFICULTY)]
+        
+        if not any(p in self.parameter_index for p in patterns):
+            # High-degree spaces are far too large to index (or to repeat by chance)
+            for _ in range(BUDGET_REDRAWS + 1):
+                start = time.perf_counter()
+                func_data = self.build_function(rng.choice(patterns), self._sample_high_degree_parameters(rng))
+                if (time.perf_counter() - start) * 1000 <= ANALYSIS_BUDGET_MS:
+                    return func_data
+                ANALYSIS_BUDGET_OVERRUNS.inc()
+            ANALYSIS_BUDGET_FALLBACKS.inc()
+            return self.generate_function(min(difficulty, MAX_DIFFICULTY) - 1, exclude, rng)
+        
+        excluded = self._excluded_positions(patterns, exclude)
+        
+        available = [p for p in patterns if len(self.parameter_index[p][0]) > len(excluded[p])]
+        pattern = rng.choice(available or patterns)
+        params = self._sample_parameters(pattern, rng, excluded[pattern] if available else ())
+        return self.build_function(pattern, params)
     
-    def _generate_simple_function(self):
-        """Generate simple rational functions for beginners"""
-        patterns = [
-            self._simple_vertical_asymptote,
-            self._simple_horizontal_asymptote,
-            self._simple_with_hole
-        ]
-        
-        pattern = random.choice(patterns)
-        return pattern()
+    def build_function(self, pattern, params, use_cache=True):
+        """Build the function data for a pattern from an explicit parameter tuple
+        
+        Analysis is skipped when the puzzle's features are already cached;
+        use_cache=False always analyzes and leaves the cache untouched.
+        """
+        params = tuple(params)
+        code = puzzle_codec.encode(pattern, params)
+        cached = _cached_analysis(code) if use_cache else None
+        func_data = getattr(self, pattern)(params, analyze=cached is None)
+        if cached is not None:
+            func_data['features'], func_data['answer_key'] = cached
+        elif use_cache:
+            _cache_analysis(code, func_data['features'], func_data['answer_key'])
+        func_data['pattern'] = pattern
+        func_data['params'] = params
+        func_data['code'] = code
+        return func_data
     
-    def _generate_medium_function(self):
-        """Generate medium difficulty functions"""
-        patterns = [
-            self._medium_multiple_asymptotes,
-            self._medium_with_intercepts,
-            self._medium_oblique_asymptote
-        ]
-        
-        pattern = random.choice(patterns)
-        return pattern()
+    def from_code(self, code, use_cache=True):
+        """Build the function data for a puzzle code; raises ValueError for invalid codes"""
+        pattern, params = puzzle_codec.decode(code)
+        self.validate_parameters(pattern, params)
+        return self.build_function(pattern, params, use_cache)
     
-    def _generate_complex_function(self):
-        """Generate complex functions for advanced students"""
-        patterns = [
-            self._complex_multiple_features,
-            self._complex_high_degree,
-            self._complex_with_parameters
-        ]
-        
-        pattern = random.choice(patterns)
-        return pattern()
+    def validate_parameters(self, pattern, params):
+        """Raise ValueError unless params is a tuple the pattern could have drawn itself"""
+        if pattern in self.parameter_index:
+            if params not in self.parameter_index[pattern][1]:
+                raise ValueError(f"Invalid parameters for {pattern}: {params}")
+            return
+        if pattern == custom_puzzle.CUSTOM_PATTERN:
+            custom_puzzle.from_params(params)
+            return
+        # _advanced_high_degree: (lead, q, n_num, *num_roots, *den_roots)
+        if len(params) < 3:
+            raise ValueError(f"Invalid parameters for {pattern}: {params}")
+        lead, q, num_count = params[:3]
+        num_roots, den_roots = params[3:3 + num_count], params[3 + num_count:]
+        if (lead not in (1, 2, 3, -1, -2) or q not in (0, 1, 2, 4) or not 1 <= num_count <= HIGH_DEGREE_MAX_ROOTS
+                or len(num_roots) != num_count or not 1 <= len(den_roots) <= HIGH_DEGREE_MAX_ROOTS
+                or any(abs(r) > HIGH_DEGREE_MAX_ROOT for r in params[3:])
+                # The sampler draws distinct roots and lists each side in increasing order
+                or any(a >= b for roots in (num_roots, den_roots) for a, b in zip(roots, roots[1:]))):
+            raise ValueError(f"Invalid parameters for {pattern}: {params}")
+    
+    def parameter_space(self, pattern):
+        """Return every valid parameter tuple of a pattern"""
+        return self.parameter_index[pattern][0]
+    
+    def _excluded_positions(self, patterns, exclude):
+        """Map each pattern to the sorted index positions of already-seen puzzle codes"""
+        excluded = {p: set() for p in patterns}
+        for code in exclude or ():
+            pattern, params = puzzle_codec.decode(code)
+            if pattern in excluded:
+                position = self.parameter_index[pattern][1].get(tuple(params))
+                if position is not None:
+                    excluded[pattern].add(position)
+        return {p: sorted(positions) for p, positions in excluded.items()}
+    
+    def _sample_parameters(self, pattern, rng=None, excluded=()):
+        """Draw one valid parameter tuple uniformly, skipping excluded positions without retries"""
+        rng = rng or random
+        tuples = self.parameter_index[pattern][0]
+        i = rng.randrange(len(tuples) - len(excluded))
+        # Shift the draw past every excluded position at or below it
+        for position in excluded:
+            if position <= i:
+                i += 1
+            else:
+                break
+        return tuples[i]
     
-    def _simple_vertical_asymptote(self):
+    def _simple_vertical_asymptote(self, params=None, analyze=True):
         """Create function with simple vertical asymptote"""
         # f(x) = 1/(x-a) or f(x) = k/(x-a)
-        a = random.randint(-5, 5)
-        k = random.choice([1, 2, 3, -1, -2])
-        
-        if a == 0:
-            a = 1
+        if params is None:
+            params = self._sample_parameters('_simple_vertical_asymptote')
+        a, k = params
         
-        numerator = k
+        numerator = sp.Integer(k)
         denominator = self.x - a
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _simple_horizontal_asymptote(self):
+    def _simple_horizontal_asymptote(self, params=None, analyze=True):
         """Create function with horizontal asymptote"""
         # f(x) = (ax + b)/(cx + d) where deg(num) = deg(den)
-        a, b = random.randint(1, 3), random.randint(-5, 5)
-        c, d = random.randint(1, 3), random.randint(-5, 5)
-        
-        # Ensure denominator doesn't factor with numerator
-        if b * c == a * d:
-            d += 1
+        if params is None:
+            params = self._sample_parameters('_simple_horizontal_asymptote')
+        a, b, c, d = params
         
         numerator = a * self.x + b
         denominator = c * self.x + d
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _simple_with_hole(self):
+    def _simple_with_hole(self, params=None, analyze=True):
         """Create function with a hole"""
         # f(x) = (x-a)(x-b)/(x-a)(x-c) -> hole at x=a, VA at x=c
-        a = random.randint(-3, 3)
-        b = random.randint(-4, 4)
-        c = random.randint(-4, 4)
-        
-        # Ensure all values are different
-        while b == a or c == a or c == b:
-            b = random.randint(-4, 4)
-            c = random.randint(-4, 4)
+        if params is None:
+            params = self._sample_parameters('_simple_with_hole')
+        a, b, c = params
         
         numerator = (self.x - a) * (self.x - b)
         denominator = (self.x - a) * (self.x - c)
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _medium_multiple_asymptotes(self):
+    def _medium_multiple_asymptotes(self, params=None, analyze=True):
         """Create function with multiple vertical asymptotes"""
         # f(x) = (ax + b)/((x-c)(x-d))
-        a, b = random.randint(1, 3), random.randint(-3, 3)
-        c = random.randint(-3, 3)
-        d = random.randint(-3, 3)
-        
-        while d == c:
-            d = random.randint(-3, 3)
+        if params is None:
+            params = self._sample_parameters('_medium_multiple_asymptotes')
+        a, b, c, d = params
         
         numerator = a * self.x + b
         denominator = (self.x - c) * (self.x - d)
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _medium_with_intercepts(self):
+    def _medium_with_intercepts(self, params=None, analyze=True):
         """Create function with clear intercepts"""
         # f(x) = (x-a)(x-b)/(x-c)(x-d)
-        a, b = random.randint(-2, 2), random.randint(-2, 2)
-        c, d = random.randint(-3, 3), random.randint(-3, 3)
-        
-        # Ensure no common factors
-        while c in [a, b] or d in [a, b] or c == d:
-            c = random.randint(-3, 3)
-            d = random.randint(-3, 3)
+        if params is None:
+            params = self._sample_parameters('_medium_with_intercepts')
+        a, b, c, d = params
         
         numerator = (self.x - a) * (self.x - b)
         denominator = (self.x - c) * (self.x - d)
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _medium_oblique_asymptote(self):
+    def _medium_oblique_asymptote(self, params=None, analyze=True):
         """Create function with oblique asymptote"""
         # f(x) = (ax^2 + bx + c)/(dx + e)
-        a = random.randint(1, 2)
-        b, c = random.randint(-3, 3), random.randint(-3, 3)
-        d = random.randint(1, 2)
-        e = random.randint(-3, 3)
+        if params is None:
+            params = self._sample_parameters('_medium_oblique_asymptote')
+        a, b, c, d, e = params
         
         numerator = a * self.x**2 + b * self.x + c
         denominator = d * self.x + e
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _complex_multiple_features(self):
+    def _complex_multiple_features(self, params=None, analyze=True):
         """Create function with multiple features"""
         # f(x) = (x-a)(x-b)(x-c)/((x-d)(x-e)(x-a))
-        a = random.randint(-2, 2)
-        b, c = random.randint(-3, 3), random.randint(-3, 3)
-        d, e = random.randint(-3, 3), random.randint(-3, 3)
-        
-        while d in [b, c] or e in [b, c, d]:
-            d = random.randint(-3, 3)
-            e = random.randint(-3, 3)
+        if params is None:
+            params = self._sample_parameters('_complex_multiple_features')
+        a, b, c, d, e = params
         
         numerator = (self.x - a) * (self.x - b) * (self.x - c)
         denominator = (self.x - d) * (self.x - e) * (self.x - a)
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _complex_high_degree(self):
+    def _complex_high_degree(self, params=None, analyze=True):
         """Create higher degree rational function"""
-        # Create polynomials of degree 2-3
-        num_coeffs = [random.randint(1, 2)] + [random.randint(-2, 2) for _ in range(2)]
-        den_coeffs = [random.randint(1, 2)] + [random.randint(-2, 2) for _ in range(random.randint(1, 2))]
+        # Quadratic numerator over a linear or quadratic denominator
+        if params is None:
+            params = self._sample_parameters('_complex_high_degree')
+        num_coeffs, den_coeffs = params[:3], params[3:]
         
         numerator = sum(coeff * self.x**i for i, coeff in enumerate(reversed(num_coeffs)))
         denominator = sum(coeff * self.x**i for i, coeff in enumerate(reversed(den_coeffs)))
         
-        return self._create_function_data(numerator, denominator)
+        return self._create_function_data(numerator, denominator, analyze)
     
-    def _complex_with_parameters(self):
+    def _complex_with_parameters(self, params=None, analyze=True):
         """Create function with parameters that create interesting behavior"""
         # Choose a complex pattern
+        if params is None:
+            params = self._sample_parameters('_complex_with_parameters')
+        variant, = params
+        
         patterns = [
             lambda: self._create_function_data(
                 (self.x**2 - 1), 
-                (self.x**2 - 4)
+                (self.x**2 - 4),
+                analyze
             ),
             lambda: self._create_function_data(
                 (self.x**2 + self.x - 2), 
-                (self.x**3 - self.x)
+                (self.x**3 - self.x),
+                analyze
             ),
             lambda: self._create_function_data(
                 (2*self.x**2 - 3*self.x + 1), 
-                (self.x**2 - 5*self.x + 6)
+                (self.x**2 - 5*self.x + 6),
+                analyze
             )
         ]
         
-        return random.choice(patterns)()
+        return patterns[variant]()
+    
+    def warm_up(self):
+        """Exercise every pattern once so one-off SymPy/NumPy start-up costs are paid up front
+        
+        Returns the time taken per pattern in seconds.
+        """
+        timings = {}
+        rng = random.Random(0)
+        for patterns in DIFFICULTY_PATTERNS.values():
+            for pattern in patterns:
+                start = time.perf_counter()
+                if pattern in self.parameter_index:
+                    self.build_function(pattern, self.parameter_space(pattern)[0])
+                else:
+                    self.build_function(pattern, self._sample_high_degree_parameters(rng))
+                timings[pattern] = time.perf_counter() - start
+        return timings
+    
+    def _sample_high_degree_parameters(self, rng=None):
+        """Draw parameters for a degree 5-10 rational function with one or two holes"""
+        # params = (lead, q, number of numerator roots, *numerator roots, *denominator roots)
+        # where q > 0 adds an irreducible factor (x^2 + q) to the denominator
+        rng = rng or random
+        lead = rng.choice((1, 2, 3, -1, -2))
+        q = rng.choice((0, 1, 2, 4))
+        
+        den_roots = rng.sample(range(-6, 7), rng.randint(5, 10) - (2 if q else 0))
+        shared = den_roots[:rng.randint(1, 2)]
+        free = [r for r in range(-9, 10) if r not in den_roots]
+        num_roots = shared + rng.sample(free, rng.randint(5, 10) - len(shared))
+        
+        return (lead, q, len(num_roots), *sorted(num_roots), *sorted(den_roots))
+    
+    def _advanced_high_degree(self, params=None, analyze=True):
+        """Create a degree 5-10 rational function analyzed numerically"""
+        # f(x) = lead * prod(x - r_i) / (prod(x - s_j) * (x^2 + q))
+        if params is None:
+            params = self._sample_high_degree_parameters()
+        lead, q, num_count = params[:3]
+        num_roots, den_roots = params[3:3 + num_count], params[3 + num_count:]
+        
+        # Built and shown factored: the roots are known, so no SymPy cancel or expand is needed.
+        # The factors are already canonical, so the products skip SymPy's (slow) flattening
+        quadratic = [self.x**2 + q] if q else []
+        shared = set(num_roots) & set(den_roots)
+        
+        def product(coefficient, roots, extra=()):
+            return sp.Mul(sp.Integer(coefficient), *[self.x - r for r in roots], *extra, evaluate=False)
+        
+        numerator = product(lead, num_roots)
+        denominator = product(1, den_roots, quadratic)
+        expression = (product(lead, [r for r in num_roots if r not in shared])
+                      / product(1, [r for r in den_roots if r not in shared], quadratic))
+        latex = self._frac_latex(_factored_latex(num_roots, lead),
+                                 _factored_latex(den_roots) + (f' \\left(x^{{2}} + {q}\\right)' if q else ''))
+        num_coeffs, den_coeffs = self._high_degree_coefficients(params)
+        
+        return self._create_numeric_function_data(numerator, denominator, expression, latex,
+                                                  num_coeffs, den_coeffs, analyze)
     
-    def _create_function_data(self, numerator, denominator):
+    def _high_degree_coefficients(self, params):
+        """Integer (numerator, denominator) coefficients, highest power first, of an _advanced_high_degree function"""
+        lead, q, num_count = params[:3]
+        num_coeffs = poly_from_roots(params[3:3 + num_count], lead)
+        den_coeffs = poly_from_roots(params[3 + num_count:])
+        if q:
+            den_coeffs = poly_multiply(den_coeffs, [1, 0, q])
+        return num_coeffs, den_coeffs
+    
+    def _custom(self, params, analyze=True):
+        """Create a teacher-authored function from its coefficients, analyzed numerically"""
+        # params = (numerator degree, *numerator coefficients, *denominator coefficients)
+        num_coeffs, den_coeffs = custom_puzzle.from_params(params)
+        
+        numerator = Poly(num_coeffs, self.x).as_expr()
+        denominator = Poly(den_coeffs, self.x).as_expr()
+        # The common factor is divided out exactly on the coefficients, not with SymPy's cancel
+        reduced_num, reduced_den = cancel_common(num_coeffs, den_coeffs)
+        expression = Poly(reduced_num, self.x).as_expr() / Poly(reduced_den, self.x).as_expr()
+        latex = self._frac_latex(_expanded_latex(num_coeffs), _expanded_latex(den_coeffs))
+        
+        return self._create_numeric_function_data(numerator, denominator, expression, latex,
+                                                  num_coeffs, den_coeffs, analyze)
+    
+    def _create_numeric_function_data(self, numerator, denominator, expression, latex, num_coeffs, den_coeffs,
+                                      analyze=True):
+        """Create function data using the numeric analysis path instead of SymPy cancel, solve and latex"""
+        features = self._analyze_function_numeric(num_coeffs, den_coeffs) if analyze else None
+        return {
+            'expression': expression,
+            'original_numerator': numerator,
+            'original_denominator': denominator,
+            'latex': latex,
+            'features': features,
+            'answer_key': AnswerKey(features) if features is not None else None
+        }
+    
+    @metrics.timed('analyze_function_numeric')
+    def _analyze_function_numeric(self, num_coeffs, den_coeffs):
+        """Analyze a function from its coefficients"""
+        return analyze_rational(num_coeffs, den_coeffs)
+    
+    def cross_check(self, func_data, tol=CROSS_CHECK_TOL):
+        """Features where the puzzle's numeric analysis disagrees with an exact SymPy one (empty if none)"""
+        num = Poly(func_data['original_numerator'], self.x)
+        den = Poly(func_data['original_denominator'], self.x)
+        common = num.gcd(den)
+        reduced_num, reduced_den = num.exquo(common), den.exquo(common)
+        
+        # Each irreducible factor's multiplicities in the numerator and denominator decide what its roots are
+        multiplicity = {}
+        for side, poly in enumerate((num, den)):
+            for factor, power in poly.factor_list()[1]:
+                multiplicity.setdefault(factor, [0, 0])[side] = power
+        
+        exact = {'vertical_asymptotes': [], 'holes': [], 'x_intercepts': []}
+        for factor, (in_num, in_den) in multiplicity.items():
+            for (low, high), _ in factor.intervals(eps=tol):
+                r = float((low + high) / 2)
+                if in_den > in_num:
+                    exact['vertical_asymptotes'].append(r)
+                elif in_den:
+                    exact['holes'].append((r, float(reduced_num.eval(r) / reduced_den.eval(r))))
+                else:
+                    exact['x_intercepts'].append(r)
+        exact['horizontal_asymptote'] = (0.0 if num.degree() < den.degree() else
+                                         float(num.LC() / den.LC()) if num.degree() == den.degree() else None)
+        exact['y_intercept'] = float(num.eval(0) / den.eval(0)) if den.eval(0) != 0 else None
+        
+        def same(a, b):
+            if a is None or b is None:
+                return a is None and b is None
+            if isinstance(a, (list, tuple)):
+                return len(a) == len(b) and all(same(p, q) for p, q in zip(sorted(a), sorted(b)))
+            return abs(a - b) <= tol * (1 + abs(b))
+        
+        return [name for name, value in exact.items() if not same(func_data['features'][name], value)]
+    
+    def _create_function_data(self, numerator, denominator, analyze=True):
         """Create comprehensive function data including all features"""
         # Simplify the function
         simplified = cancel(numerator / denominator)
@@ -195,7 +528,7 @@ class FunctionGenerator:
         original_expr = numerator / denominator
         
         # Calculate all features
-        features = self._analyze_function(numerator, denominator, simplified)
+        features = self._analyze_function(numerator, denominator, simplified) if analyze else None
         
         # Create LaTeX representation
         latex = self._to_latex(numerator, denominator)
@@ -205,9 +538,11 @@ class FunctionGenerator:
             'original_numerator': numerator,
             'original_denominator': denominator,
             'latex': latex,
-            'features': features
+            'features': features,
+            'answer_key': AnswerKey(features) if features is not None else None
         }
     
+    @metrics.timed('analyze_function')
     def _analyze_function(self, numerator, denominator, simplified):
         """Analyze function to find all key features"""
         features = {
@@ -229,11 +564,12 @@ class FunctionGenerator:
             features['horizontal_asymptote'] = self._find_horizontal_asymptote(numerator, denominator)
             
             # Find intercepts
-            features['x_intercepts'] = self._find_x_intercepts(simplified)
-            features['y_intercept'] = self._find_y_intercept(simplified)
+            features['x_intercepts'] = self._find_x_intercepts(simplified, denominator)
+            features['y_intercept'] = self._find_y_intercept(simplified, denominator)
             
         except Exception as e:
             # Fallback to safe defaults
+            metrics.record_error('function_generator.analyze_function')
             print(f"Error analyzing function: {e}")
             
         return features
@@ -243,33 +579,35 @@ class FunctionGenerator:
         result = {'vertical_asymptotes': [], 'holes': []}
         
         try:
-            # Factor both numerator and denominator
-            num_factors = factor(numerator)
-            den_factors = factor(denominator)
-            
             # Find zeros of denominator
             den_zeros = solve(denominator, self.x)
+            simplified = cancel(numerator / denominator)
+            _, reduced_denominator = simplified.as_numer_denom()
             
             for zero in den_zeros:
+                if zero.is_real is False:
+                    # Complex zeros are neither asymptotes nor holes
+                    continue
                 try:
                     zero_val = float(zero)
                     
-                    # Check if this zero is also a zero of numerator (hole)
-                    num_at_zero = numerator.subs(self.x, zero)
-                    
-                    if num_at_zero == 0:
+                    # A zero that cancels out of the denominator entirely is a hole
+                    # (expanded, so surd roots of quadratics reduce to an exact 0)
+                    if sp.expand(reduced_denominator.subs(self.x, zero)) != 0:
                         # It's a hole - find the y-coordinate
-                        simplified = cancel(numerator / denominator)
                         y_val = float(simplified.subs(self.x, zero))
                         result['holes'].append((zero_val, y_val))
                     else:
                         # It's a vertical asymptote
                         result['vertical_asymptotes'].append(zero_val)
                         
-                except:
+                except Exception:
+                    # A zero or hole value that cannot be evaluated to a real number
+                    metrics.record_error('function_generator.denominator_zero')
                     continue
                     
         except Exception as e:
+            metrics.record_error('function_generator.vertical_asymptotes_and_holes')
             print(f"Error finding VA/holes: {e}")
             
         return result
@@ -295,11 +633,12 @@ class FunctionGenerator:
                 # No horizontal asymptote (might have oblique)
                 return None
                 
-        except:
+        except Exception:
+            metrics.record_error('function_generator.horizontal_asymptote')
             return None
     
-    def _find_x_intercepts(self, expression):
-        """Find x-intercepts"""
+    def _find_x_intercepts(self, expression, denominator):
+        """Find x-intercepts (zeros of the simplified function where it is defined)"""
         try:
             # Solve numerator = 0
             x_intercepts = []
@@ -309,29 +648,45 @@ class FunctionGenerator:
             zeros = solve(num, self.x)
             
             for zero in zeros:
+                if zero.is_real is False:
+                    # Complex zeros are not x-intercepts
+                    continue
                 try:
+                    if sp.expand(denominator.subs(self.x, zero)) == 0:
+                        # A hole, not an intercept
+                        continue
                     x_intercepts.append(float(zero))
-                except:
+                except Exception:
+                    # A zero that cannot be evaluated to a real number
+                    metrics.record_error('function_generator.numerator_zero')
                     continue
                     
             return x_intercepts
             
-        except:
+        except Exception:
+            metrics.record_error('function_generator.x_intercepts')
             return []
     
-    def _find_y_intercept(self, expression):
+    def _find_y_intercept(self, expression, denominator):
         """Find y-intercept"""
         try:
+            if denominator.subs(self.x, 0) == 0:
+                # Undefined at x = 0 (a vertical asymptote or a hole)
+                return None
             y_val = expression.subs(self.x, 0)
             return float(y_val)
-        except:
+        except Exception:
+            # Undefined at x = 0
+            metrics.record_error('function_generator.y_intercept')
             return None
     
     def _to_latex(self, numerator, denominator):
         """Convert function to LaTeX format"""
         try:
-            num_latex = sp.latex(numerator)
-            den_latex = sp.latex(denominator)
-            return f"f(x) = \\frac{{{num_latex}}}{{{den_latex}}}"
-        except:
+            return self._frac_latex(sp.latex(numerator), sp.latex(denominator))
+        except Exception:
+            metrics.record_error('function_generator.latex')
             return "f(x) = \\text{Error generating LaTeX}"
+    
+    def _frac_latex(self, num_latex, den_latex):
+        return f"f(x) = \\frac{{{num_latex}}}{{{den_latex}}}"
@@ -1,21 +1,100 @@
-import sympy as sp
-from sympy import symbols, apart, limit, oo, solve, factor, cancel, Poly
-import re
+from itertools import chain
+import numpy as np
+import metrics
+from answer_key import NO_VALUE_ANSWERS, TOLERANCE, AnswerKey, parse_float, parse_floats, parse_number, parse_numbers
 
-class GameLogic:
-    def __init__(self):
-        self.x = symbols('x')
+# Answer fields graded by check_answers, 100 points each
+FEATURES = ('vertical_asymptotes', 'horizontal_asymptote', 'holes', 'x_intercepts', 'y_intercept')
+
+# Fields answered with a comma-separated list of x-values
+LIST_FEATURES = ('vertical_asymptotes', 'holes', 'x_intercepts')
+# Batch float comparisons this close to TOLERANCE are re-graded exactly
+BOUNDARY_TOL = 1e-9
+
+# Parsed answers are cached; their hit rate shows how repetitive submissions are
+metrics.REGISTRY.register_cache('parse_number', parse_number)
+metrics.REGISTRY.register_cache('parse_numbers', parse_numbers)
+
+def _near_boundary(distance, scale):
+    return np.abs(distance - TOLERANCE) <= BOUNDARY_TOL * (1 + np.abs(scale))
+
+def _grade_values(correct, answers, answer_ids, puzzle_ids):
+    """Whether each (answer, puzzle) pair matches a single-value key (see ValueKey.matches)"""
+    no_value = np.zeros(len(answers), dtype=bool)
+    values = np.full(len(answers), np.nan)
+    for i, answer in enumerate(answers):
+        text = answer.strip().lower()
+        if text in NO_VALUE_ANSWERS:
+            no_value[i] = True
+            continue
+        try:
+            values[i] = parse_float(text)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            pass
     
+    absent = np.array([key.value is None for key in correct])[puzzle_ids]
+    target = np.array([np.nan if key.value is None else float(key.value) for key in correct])[puzzle_ids]
+    distance = np.abs(values[answer_ids] - target)
+    graded = np.where(absent, no_value[answer_ids], distance < TOLERANCE)
+    for i in np.flatnonzero(~absent & _near_boundary(distance, target)):
+        graded[i] = correct[puzzle_ids[i]].matches(answers[answer_ids[i]])
+    return graded
+
+def _grade_lists(correct, answers, answer_ids, puzzle_ids):
+    """Whether each (answer, puzzle) pair matches a list key (see ListKey.matches)"""
+    parsed = [parse_floats(answer) for answer in answers]
+    counts = np.fromiter(map(len, parsed), dtype=np.int64, count=len(parsed))
+    starts = np.cumsum(counts) - counts
+    numbers = np.fromiter(chain.from_iterable(parsed), dtype=float, count=counts.sum())
+    
+    graded = np.zeros(len(answer_ids), dtype=bool)
+    order = np.argsort(puzzle_ids, kind='stable')
+    for group in np.split(order, np.flatnonzero(np.diff(puzzle_ids[order])) + 1):
+        if not len(group):
+            continue
+        key = correct[puzzle_ids[group[0]]]
+        ids = answer_ids[group]
+        lengths = counts[ids]
+        if not key.values:
+            graded[group] = lengths == 0
+            continue
+        
+        # Numbers of every answer in the group, with the position of the pair each belongs to
+        owner = np.repeat(np.arange(len(ids)), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        value = numbers[np.arange(lengths.sum()) - offsets[owner] + starts[ids][owner]]
+        
+        # The nearest correct value is one of the two neighbours of the insertion point
+        key_values = np.array([float(v) for v in key.values])
+        right = np.minimum(np.searchsorted(key_values, value), len(key_values) - 1)
+        left = np.maximum(right - 1, 0)
+        left_distance, right_distance = np.abs(value - key_values[left]), np.abs(value - key_values[right])
+        position = np.where(right_distance < left_distance, right, left)
+        distance = np.minimum(left_distance, right_distance)
+        matched = distance < TOLERANCE
+        ambiguous = _near_boundary(distance, value) | (
+            (left != right) & (np.maximum(left_distance, right_distance) < TOLERANCE + BOUNDARY_TOL * (1 + np.abs(value))))
+        
+        # Correct if every number matched and together they name every correct value
+        unmatched = np.bincount(owner[~matched], minlength=len(ids))
+        named = np.unique(owner[matched] * len(key_values) + position[matched]) // len(key_values)
+        graded[group] = (unmatched == 0) & (np.bincount(named, minlength=len(ids)) == len(key_values))
+        for i in np.flatnonzero(np.bincount(owner[ambiguous], minlength=len(ids))):
+            graded[group[i]] = key.matches(answers[ids[i]])
+    return graded
+
+class GameLogic:
+    @metrics.timed('check_answers')
     def check_answers(self, func_data, user_answers):
         """Check user answers against the correct function features"""
-        correct_features = func_data['features']
+        answer_key = self._answer_key(func_data)
         score = 0
         max_score = 500  # 100 points per feature
         feedback = {}
         
         # Check vertical asymptotes
         va_score, va_feedback = self._check_vertical_asymptotes(
-            correct_features['vertical_asymptotes'], 
+            answer_key.vertical_asymptotes, 
             user_answers['vertical_asymptotes']
         )
         score += va_score
@@ -23,7 +102,7 @@ class GameLogic:
         
         # Check horizontal asymptote
         ha_score, ha_feedback = self._check_horizontal_asymptote(
-            correct_features['horizontal_asymptote'], 
+            answer_key.horizontal_asymptote, 
             user_answers['horizontal_asymptote']
         )
         score += ha_score
@@ -31,7 +110,7 @@ class GameLogic:
         
         # Check holes
         holes_score, holes_feedback = self._check_holes(
-            correct_features['holes'], 
+            answer_key.holes, 
             user_answers['holes']
         )
         score += holes_score
@@ -39,7 +118,7 @@ class GameLogic:
         
         # Check x-intercepts
         x_int_score, x_int_feedback = self._check_x_intercepts(
-            correct_features['x_intercepts'], 
+            answer_key.x_intercepts, 
             user_answers['x_intercepts']
         )
         score += x_int_score
@@ -47,7 +126,7 @@ class GameLogic:
         
         # Check y-intercept
         y_int_score, y_int_feedback = self._check_y_intercept(
-            correct_features['y_intercept'], 
+            answer_key.y_intercept, 
             user_answers['y_intercept']
         )
         score += y_int_score
@@ -55,33 +134,65 @@ class GameLogic:
         
         return score, feedback
     
-    def _parse_numbers(self, input_str):
-        """Parse comma-separated numbers from string"""
-        if not input_str or input_str.lower().strip() in ['none', 'undefined', '']:
-            return []
+    def _answer_key(self, func_data):
+        """The puzzle's compiled answer key (compiled on the fly for puzzles generated without one)"""
+        answer_key = func_data.get('answer_key')
+        if answer_key is None:
+            answer_key = AnswerKey(func_data['features'])
+        return answer_key
+    
+    @metrics.timed('check_answers_batch')
+    def check_answers_batch(self, puzzles, submissions, puzzle_index=None):
+        """Grade many submissions at once, column by column
         
-        try:
-            # Remove spaces and split by comma
-            numbers = []
-            for item in input_str.split(','):
-                item = item.strip()
-                if item:
-                    # Try to parse as fraction or decimal
-                    if '/' in item:
-                        parts = item.split('/')
-                        numbers.append(float(parts[0]) / float(parts[1]))
-                    else:
-                        numbers.append(float(item))
-            return sorted(numbers)
-        except:
-            return []
+        puzzles is one func_data dict or a list of them. submissions maps each
+        feature name to a sequence of answer strings (one per row), e.g. the
+        columns of an uploaded CSV. puzzle_index gives, for each row, the
+        position of the puzzle it answers (all rows answer puzzles[0] if omitted);
+        an index outside puzzles raises ValueError.
+        
+        Each distinct answer string is parsed once into float arrays, which are
+        compared with the answer keys' values in bulk. Comparisons within
+        BOUNDARY_TOL of TOLERANCE, or close to two correct values at once, are
+        re-graded exactly, so results are identical to calling check_answers per row.
+        
+        Returns (scores, correctness): an int array of scores and a dict of
+        feature name -> bool array.
+        """
+        if isinstance(puzzles, dict):
+            puzzles = [puzzles]
+        n_rows = len(submissions[FEATURES[0]])
+        if puzzle_index is None:
+            puzzle_index = np.zeros(n_rows, dtype=np.int64)
+        puzzle_index = np.asarray(puzzle_index).reshape(-1)
+        if len(puzzle_index) != n_rows or (n_rows and puzzle_index.dtype.kind not in 'iu'):
+            raise ValueError(f"puzzle_index must hold one integer per row ({n_rows} rows)")
+        if n_rows and (puzzle_index.min() < 0 or puzzle_index.max() >= len(puzzles)):
+            raise ValueError(f"puzzle_index values must lie in [0, {len(puzzles)})")
+        puzzle_index = puzzle_index.astype(np.int64)
+        
+        keys = [self._answer_key(p) for p in puzzles]
+        correctness = {}
+        for feature in FEATURES:
+            correct = [getattr(key, feature) for key in keys]
+            column = np.asarray(submissions[feature], dtype=str).reshape(-1)
+            
+            # Grade each distinct (answer, puzzle) pair once, then broadcast back to rows
+            answers, answer_ids = np.unique(column, return_inverse=True)
+            pairs, pair_inverse = np.unique(answer_ids.reshape(-1) * len(puzzles) + puzzle_index,
+                                            return_inverse=True)
+            grade = _grade_lists if feature in LIST_FEATURES else _grade_values
+            graded = grade(correct, answers, pairs // len(puzzles), pairs % len(puzzles))
+            correctness[feature] = graded[pair_inverse.reshape(-1)]
+        
+        scores = 100 * np.sum([correctness[f] for f in FEATURES], axis=0, dtype=np.int64)
+        return scores.reshape(n_rows), correctness
     
     def _check_vertical_asymptotes(self, correct, user_input):
         """Check vertical asymptotes"""
-        user_vas = self._parse_numbers(user_input)
-        correct_vas = sorted([float(va) for va in correct])
+        correct_vas = correct.display
         
-        if set(user_vas) == set(correct_vas):
+        if correct.matches(user_input):
             return 100, {
                 'correct': True, 
                 'message': f'Correct! Vertical asymptotes at x = {", ".join(map(str, correct_vas))}'
@@ -94,29 +205,25 @@ class GameLogic:
     
     def _check_horizontal_asymptote(self, correct, user_input):
         """Check horizontal asymptote"""
-        user_input = user_input.strip().lower()
+        matched = correct.matches(user_input)
+        correct = correct.display
         
         if correct is None:
-            if user_input in ['none', 'undefined', '']:
+            if matched:
                 return 100, {'correct': True, 'message': 'Correct! No horizontal asymptote exists.'}
             else:
                 return 0, {'correct': False, 'message': 'Incorrect. There is no horizontal asymptote.'}
         else:
-            try:
-                user_ha = float(user_input)
-                if abs(user_ha - correct) < 0.001:
-                    return 100, {'correct': True, 'message': f'Correct! Horizontal asymptote at y = {correct}'}
-                else:
-                    return 0, {'correct': False, 'message': f'Incorrect. The horizontal asymptote is y = {correct}'}
-            except:
+            if matched:
+                return 100, {'correct': True, 'message': f'Correct! Horizontal asymptote at y = {correct}'}
+            else:
                 return 0, {'correct': False, 'message': f'Incorrect. The horizontal asymptote is y = {correct}'}
     
     def _check_holes(self, correct, user_input):
         """Check holes"""
-        user_holes = self._parse_numbers(user_input)
-        correct_holes = sorted([float(hole[0]) for hole in correct]) if correct else []
+        correct_holes = correct.display
         
-        if set(user_holes) == set(correct_holes):
+        if correct.matches(user_input):
             if not correct_holes:
                 return 100, {'correct': True, 'message': 'Correct! No holes in this function.'}
             else:
@@ -135,10 +242,9 @@ class GameLogic:
     
     def _check_x_intercepts(self, correct, user_input):
         """Check x-intercepts"""
-        user_x_ints = self._parse_numbers(user_input)
-        correct_x_ints = sorted([float(x_int) for x_int in correct]) if correct else []
+        correct_x_ints = correct.display
         
-        if set(user_x_ints) == set(correct_x_ints):
+        if correct.matches(user_input):
             if not correct_x_ints:
                 return 100, {'correct': True, 'message': 'Correct! No x-intercepts for this function.'}
             else:
@@ -157,21 +263,18 @@ class GameLogic:
     
     def _check_y_intercept(self, correct, user_input):
         """Check y-intercept"""
-        user_input = user_input.strip().lower()
+        matched = correct.matches(user_input)
+        correct = correct.display
         
         if correct is None:
-            if user_input in ['none', 'undefined', '']:
+            if matched:
                 return 100, {'correct': True, 'message': 'Correct! No y-intercept (undefined at x=0).'}
             else:
                 return 0, {'correct': False, 'message': 'Incorrect. The y-intercept is undefined.'}
         else:
-            try:
-                user_y_int = float(user_input)
-                if abs(user_y_int - correct) < 0.001:
-                    return 100, {'correct': True, 'message': f'Correct! y-intercept at y = {correct}'}
-                else:
-                    return 0, {'correct': False, 'message': f'Incorrect. The y-intercept is y = {correct}'}
-            except:
+            if matched:
+                return 100, {'correct': True, 'message': f'Correct! y-intercept at y = {correct}'}
+            else:
                 return 0, {'correct': False, 'message': f'Incorrect. The y-intercept is y = {correct}'}
     
     def get_hint(self, func_data, hint_number):
@@ -0,0 +1,211 @@
+"""Headless concurrent-player load test for Graph Quest
+
+Usage:
+    python load_test.py [--concurrency 5,10,20] [--games 1] [--output FILE]
+
+Drives the real app.py through Streamlit's AppTest harness, with no browser or
+server: menu -> start -> five rounds of answers (with random hints) -> finish ->
+leaderboard. Each concurrency level runs that many simulated players at once,
+all sharing one temporary leaderboard.json. For every level it reports rerun
+latency percentiles, throughput, CPU time per player and the peak RSS of the
+player processes, so the saturation point and the effect of a change can be
+compared.
+
+AppTest keeps a per-process runtime singleton and can't run two scripts at
+once in one process, so every player runs in a process of its own and the
+players genuinely contend for the machine's cores. Each process holds a whole
+copy of the app (imports, caches, puzzle index), so its peak RSS is what one
+app process costs, not the marginal memory of a player in a shared server.
+A level needs that much memory per player.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+RERUN_TIMEOUT = 120
+
+# Sessions sharing a process (replay.py runs several per process) must not rerun at once
+_rerun_lock = threading.Lock()
+
+FEATURE_INPUTS = {
+    'vertical_asymptotes': 'va_input',
+    'horizontal_asymptote': 'ha_input',
+    'holes': 'holes_input',
+    'x_intercepts': 'x_int_input',
+    'y_intercept': 'y_int_input',
+}
+
+def answer_for(feature, value, rng, accuracy):
+    """A player's typed answer: usually the right one, sometimes a wrong guess"""
+    if rng.random() > accuracy:
+        return rng.choice(['none', '0', '1', '-2, 2', 'undefined'])
+    if value is None:
+        return 'none'
+    if feature == 'holes':
+        return ', '.join(str(hole[0]) for hole in value) or 'none'
+    if isinstance(value, list):
+        return ', '.join(map(str, value)) or 'none'
+    return str(value)
+
+def puzzle_features(code):
+    """The features of a puzzle code (from the feature cache the app in this process filled)"""
+    from function_generator import FunctionGenerator
+    return FunctionGenerator().from_code(code)['features']
+
+class PlayerSession:
+    """One simulated player driving app.py, recording the latency of every rerun"""
+
+    def __init__(self, name, rng, accuracy=0.7, think_time=0.0):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT)
+        self.name = name
+        self.rng = rng
+        self.accuracy = accuracy
+        self.think_time = think_time
+        self.latencies = []
+        self.errors = 0
+
+    def rerun(self, step, widget=None):
+        """Run the script once (optionally after interacting with a widget) and time it"""
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, self.think_time))
+        start = time.perf_counter()
+        with _rerun_lock:
+            (widget or self.app).run()
+        self.latencies.append((step, (time.perf_counter() - start) * 1000))
+        if self.app.exception:
+            self.errors += 1
+
+    def play_game(self):
+        app = self.app
+        self.rerun('load')
+        app.text_input[0].input(self.name)
+        self.rerun('start', app.button[0].click())
+
+        rounds = app.session_state['total_rounds']
+        for round_number in range(1, rounds + 1):
+            for _ in range(self.rng.choice([0, 0, 1, 2])):
+                self.rerun('hint', app.button(key=f'hint_{round_number}').click())
+
+            features = puzzle_features(app.session_state['current_code'])
+            for feature, key in FEATURE_INPUTS.items():
+                app.text_input(key=f'{key}_{round_number}').input(
+                    answer_for(feature, features[feature], self.rng, self.accuracy)
+                )
+            self.rerun('submit', app.button(key=f'submit_{round_number}').click())
+
+            if round_number < rounds:
+                self.rerun('next_round', app.button(key='next_round_btn').click())
+            else:
+                self.rerun('finish', app.button(key='finish_game_btn').click())
+
+        leaderboard = next(b for b in app.button if 'Leaderboard' in b.label)
+        self.rerun('leaderboard', leaderboard.click())
+
+def play(args):
+    """Play games for one simulated player; returns its latencies and error count"""
+    player_id, games, seed, accuracy, think_time = args
+    rng = random.Random(seed * 100003 + player_id)
+    latencies, errors = [], 0
+    for game in range(games):
+        session = PlayerSession(f'load{player_id}', rng, accuracy, think_time)
+        try:
+            session.play_game()
+        except Exception as e:
+            print(f"Player {player_id} game {game} failed: {e}", file=sys.stderr)
+            errors += 1
+        latencies.extend(session.latencies)
+        errors += session.errors
+    return {'latencies': latencies, 'errors': errors}
+
+def run_worker(directory, player_args):
+    """Worker process: play one simulated player against the shared leaderboard file"""
+    os.chdir(directory)
+    # Untimed first run pays the process's one-off start-up (imports, warm-up)
+    PlayerSession('warmup', random.Random(0)).rerun('load')
+    # Scripts run on AppTest's own threads, so CPU is measured for the whole process
+    cpu_start = time.process_time()
+    player = play(player_args)
+    return {
+        **player,
+        'cpu_s': time.process_time() - cpu_start,
+        # ru_maxrss is in KB on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def run_level(concurrency, games, seed, accuracy, think_time):
+    """Run one concurrency level, one process per player, and summarize it"""
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(run_worker, directory, (i, games, seed, accuracy, think_time))
+                       for i in range(concurrency)]
+            players = [f.result() for f in futures]
+        wall = time.perf_counter() - start
+
+    latencies = [ms for p in players for _, ms in p['latencies']]
+    by_step = {}
+    for p in players:
+        for step, ms in p['latencies']:
+            by_step.setdefault(step, []).append(ms)
+    rss_mb = [p['peak_rss_kb'] / 1024 for p in players]
+
+    def pct(values, q):
+        return float(np.percentile(values, q)) if values else 0.0
+
+    return {
+        'concurrency': concurrency,
+        'games': concurrency * games,
+        'reruns': len(latencies),
+        'errors': sum(p['errors'] for p in players),
+        'wall_s': wall,
+        'reruns_per_s': len(latencies) / wall,
+        'games_per_s': concurrency * games / wall,
+        'p50_ms': pct(latencies, 50),
+        'p95_ms': pct(latencies, 95),
+        'p99_ms': pct(latencies, 99),
+        'max_ms': max(latencies, default=0.0),
+        'step_p95_ms': {step: pct(values, 95) for step, values in sorted(by_step.items())},
+        'cpu_s_per_player': sum(p['cpu_s'] for p in players) / concurrency,
+        'peak_rss_mb_per_process': pct(rss_mb, 50),
+        'peak_rss_mb_max': max(rss_mb, default=0.0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless concurrent-player load test")
+    parser.add_argument('--concurrency', default='5,10,20',
+                        help="comma-separated numbers of simultaneous players (one process each), one run per level")
+    parser.add_argument('--games', type=int, default=1, help="games per simulated player")
+    parser.add_argument('--accuracy', type=float, default=0.7, help="probability a typed answer is correct")
+    parser.add_argument('--think-time', type=float, default=0.0, help="maximum random pause before each action (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'players':>7} {'reruns/s':>9} {'games/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'CPU s/pl':>9} {'MB/proc':>8} {'errors':>6}")
+    for level in [int(c) for c in args.concurrency.split(',')]:
+        r = run_level(level, args.games, args.seed, args.accuracy, args.think_time)
+        results.append(r)
+        print(f"{r['concurrency']:>7} {r['reruns_per_s']:>9.1f} {r['games_per_s']:>8.2f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['cpu_s_per_player']:>9.2f} "
+              f"{r['peak_rss_mb_per_process']:>8.1f} {r['errors']:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""In-process latency and throughput metrics with Prometheus text export
+
+Phases are timed with the timed() decorator/context manager and land in the
+graphquest_phase_seconds histogram. Errors (including ones the game recovers
+from) and cache lookups are counted. Export with export_prometheus(), write it
+to a file with write_prometheus(), or serve it with start_http_server().
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labels):
+    """Render a sorted label tuple as {k="v",...}"""
+    if not labels:
+        return ''
+    escaped = (
+        f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    """Render a sample value the way Prometheus expects"""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter family keyed by label values"""
+    type_name = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self.values.items())]
+
+class Gauge(Counter):
+    """Value that can go up and down, keyed by label values"""
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+class Histogram:
+    """Cumulative-bucket histogram family keyed by label values"""
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        with self._lock:
+            counts, _ = self.values.get(tuple(sorted(labels.items())), ([0], 0.0))
+            return sum(counts)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    samples.append((f'{self.name}_bucket', key + (('le', le),), cumulative))
+                samples.append((f'{self.name}_sum', key, total))
+                samples.append((f'{self.name}_count', key, cumulative))
+        return samples
+
+class Registry:
+    """Collection of metric families plus functools caches whose hit rates are exported"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.cached_functions = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def register_cache(self, name, cached_function):
+        """Export hits/misses of an lru_cache-decorated function under the given cache name"""
+        self.cached_functions[name] = cached_function
+
+    def export(self):
+        """All metrics in Prometheus text exposition format"""
+        for name, cached_function in self.cached_functions.items():
+            info = cached_function.cache_info()
+            # Mirrors the cache's own totals, so they are set rather than incremented
+            with CACHE_LOOKUPS._lock:
+                CACHE_LOOKUPS.values[(('cache', name), ('result', 'hit'))] = info.hits
+                CACHE_LOOKUPS.values[(('cache', name), ('result', 'miss'))] = info.misses
+
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    'graphquest_phase_seconds', 'Time spent in each phase of a round'))
+PHASE_ERRORS = REGISTRY.register(Counter(
+    'graphquest_phase_errors_total', 'Exceptions raised out of a timed phase'))
+ERRORS = REGISTRY.register(Counter(
+    'graphquest_errors_total', 'Exceptions caught and recovered from, by location'))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'graphquest_cache_lookups_total', 'Cache lookups by cache and result (hit or miss)'))
+
+class timed:
+    """Time a phase into graphquest_phase_seconds; usable as a decorator or a context manager"""
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        PHASE_SECONDS.observe(time.perf_counter() - self.start, phase=self.phase)
+        # Control-flow BaseExceptions (e.g. Streamlit's rerun) are not errors
+        if exc_type is not None and issubclass(exc_type, Exception):
+            PHASE_ERRORS.inc(phase=self.phase)
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(self.phase):
+                return fn(*args, **kwargs)
+        return wrapper
+
+def record_error(where):
+    """Count an exception that was caught and handled at the given location"""
+    ERRORS.inc(where=where)
+
+def record_cache(cache, hit):
+    """Count one lookup in a hand-rolled cache"""
+    CACHE_LOOKUPS.inc(cache=cache, result='hit' if hit else 'miss')
+
+def export_prometheus():
+    """The default registry in Prometheus text format"""
+    return REGISTRY.export()
+
+_last_written = {}
+_write_lock = threading.Lock()
+
+def write_prometheus(filename, min_interval=0.0):
+    """Write the default registry to a file (e.g. for node_exporter's textfile collector)
+
+    Skipped if the same file was written less than min_interval seconds ago.
+    """
+    now = time.monotonic()
+    with _write_lock:
+        if filename in _last_written and now - _last_written[filename] < min_interval:
+            return
+        _last_written[filename] = now
+    # A temp file of its own, so concurrent writers (threads or processes) never share one
+    fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)),
+                                         prefix=f'.{os.path.basename(filename)}.', suffix='.tmp')
+    try:
+        # mkstemp makes the file private; the scraper may run as another user
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'w') as f:
+            f.write(export_prometheus())
+        # Atomic replace so scrapers never read a half-written file
+        os.replace(temp_filename, filename)
+    except OSError:
+        try:
+            os.unlink(temp_filename)
+        except OSError:
+            pass
+        raise
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = export_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serve /metrics from a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
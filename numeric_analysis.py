@@ -0,0 +1,257 @@
+import numpy as np
+from fractions import Fraction
+
+# Tolerances for the numeric feature analysis of high-degree rational functions
+ROOT_TOL = 1e-6          # roots closer than this (relative) are the same root
+IMAG_TOL = 1e-7          # roots with a smaller imaginary part are treated as real
+SNAP_TOL = 1e-9          # snap to a nearby small-denominator fraction within this
+SNAP_MAX_DENOMINATOR = 64
+NEWTON_STEPS = 8
+
+def poly_from_roots(roots, lead=1):
+    """Expand lead * prod(x - r) into an exact integer coefficient list (highest degree first)"""
+    coeffs = [lead]
+    for r in roots:
+        coeffs = [a - r * b for a, b in zip(coeffs + [0], [0] + coeffs)]
+    return coeffs
+
+def poly_multiply(a, b):
+    """Multiply two integer coefficient lists"""
+    result = [0] * (len(a) + len(b) - 1)
+    for i, ca in enumerate(a):
+        for j, cb in enumerate(b):
+            result[i + j] += ca * cb
+    return result
+
+def companion_roots(coeffs):
+    """All complex roots of a polynomial via the eigenvalues of its companion matrix"""
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), 'f')
+    # Trailing zero coefficients are roots at x = 0
+    nonzero = np.flatnonzero(coeffs)
+    zero_roots = len(coeffs) - 1 - nonzero[-1] if len(nonzero) else 0
+    coeffs = coeffs[:len(coeffs) - zero_roots]
+    degree = len(coeffs) - 1
+
+    roots = np.zeros(0, dtype=complex)
+    if degree > 0:
+        companion = np.diag(np.ones(degree - 1), -1).astype(float)
+        companion[0, :] = -coeffs[1:] / coeffs[0]
+        roots = np.linalg.eigvals(companion).astype(complex)
+    return np.concatenate([roots, np.zeros(zero_roots, dtype=complex)])
+
+def newton_refine(coeffs, roots, steps=NEWTON_STEPS):
+    """Polish approximate roots with a few vectorized Newton iterations on the original polynomial"""
+    coeffs = np.asarray(coeffs, dtype=float)
+    derivative = np.polyder(coeffs)
+    z = np.array(roots, dtype=complex)
+    for _ in range(steps):
+        p = np.polyval(coeffs, z)
+        dp = np.polyval(derivative, z)
+        # Multiple roots have dp ~ 0; leave those where the eigen solver put them
+        safe = np.abs(dp) > 1e-12 * (1 + np.abs(p))
+        step = np.where(safe, p / np.where(safe, dp, 1), 0)
+        z = z - step
+        if np.all(np.abs(step) <= 1e-15 * (1 + np.abs(z))):
+            break
+    return z
+
+def snap(value):
+    """Snap a float to a nearby small-denominator fraction so exact answers compare exactly"""
+    nearest = round(value)
+    if abs(nearest - value) <= SNAP_TOL * (1 + abs(value)):
+        return float(nearest)
+    fraction = Fraction(value).limit_denominator(SNAP_MAX_DENOMINATOR)
+    if abs(float(fraction) - value) <= SNAP_TOL * (1 + abs(value)):
+        return float(fraction)
+    return float(value)
+
+def _exact_trim(coeffs):
+    while len(coeffs) > 1 and coeffs[0] == 0:
+        coeffs = coeffs[1:]
+    return coeffs
+
+def _exact_divmod(a, b):
+    """Quotient and remainder of two Fraction coefficient lists"""
+    a = list(a)
+    quotient = []
+    for i in range(len(a) - len(b) + 1):
+        factor = a[i] / b[0]
+        quotient.append(factor)
+        for j, c in enumerate(b):
+            a[i + j] -= factor * c
+    return quotient or [Fraction(0)], _exact_trim(a[len(quotient):] if quotient else a)
+
+def _exact_gcd(a, b):
+    """Monic greatest common divisor of two Fraction coefficient lists"""
+    while any(b):
+        a, b = b, _exact_divmod(a, b)[1]
+    return [c / a[0] for c in a]
+
+def cancel_common(num_coeffs, den_coeffs):
+    """Integer (numerator, denominator) coefficients with their common polynomial factor divided out"""
+    num = _exact_trim([Fraction(int(c)) for c in num_coeffs])
+    den = _exact_trim([Fraction(int(c)) for c in den_coeffs])
+    common = _exact_gcd(num, den)
+    if len(common) == 1:
+        return [int(c) for c in num], [int(c) for c in den]
+    # By Gauss's lemma both quotients by the monic gcd still have integer coefficients
+    return ([int(c) for c in _exact_divmod(num, common)[0]],
+            [int(c) for c in _exact_divmod(den, common)[0]])
+
+def _exact_derivative(coeffs):
+    degree = len(coeffs) - 1
+    return [c * (degree - i) for i, c in enumerate(coeffs[:-1])] or [Fraction(0)]
+
+# Prime for the modular square-free test
+SQUAREFREE_PRIME = 2 ** 31 - 1
+
+def is_squarefree(coeffs, prime=SQUAREFREE_PRIME):
+    """True if an integer polynomial certainly has no repeated roots (gcd with its derivative mod prime is 1)
+
+    Reduction mod a prime not dividing the leading coefficient can only raise
+    the degree of that gcd, so degree 0 mod prime means degree 0 over Q.
+    """
+    a = [int(c) % prime for c in coeffs]
+    while a and a[0] == 0:
+        a = a[1:]
+    degree = len(a) - 1
+    if degree < 1 or int(coeffs[len(coeffs) - len(a)]) % prime == 0:
+        return degree < 1
+    b = [c * (degree - i) % prime for i, c in enumerate(a[:-1])]
+    while b and b[0] == 0:
+        b = b[1:]
+    while b:
+        # a <- a mod b, then swap
+        inverse = pow(b[0], prime - 2, prime)
+        while len(a) >= len(b):
+            factor = a[0] * inverse % prime
+            a = [(p - factor * q) % prime for p, q in zip(a, b + [0] * (len(a) - len(b)))][1:]
+            while a and a[0] == 0:
+                a = a[1:]
+        a, b = b, a
+    return len(a) == 1
+
+def squarefree_factors(coeffs):
+    """Yun's square-free factorization of an integer polynomial: [(factor, multiplicity)]
+    
+    Each factor has only simple roots, which the eigenvalue solver finds accurately;
+    multiple roots found directly come back spread out by about eps**(1/multiplicity).
+    """
+    a = _exact_trim([Fraction(int(c)) for c in coeffs])
+    if len(a) < 2:
+        return []
+    derivative = _exact_derivative(a)
+    common = _exact_gcd(a, derivative)
+    w = _exact_divmod(a, common)[0]
+    y = _exact_divmod(derivative, common)[0]
+    factors = []
+    multiplicity = 1
+    while len(w) > 1:
+        w_derivative = _exact_derivative(w)
+        z = _exact_trim([p - q for p, q in zip([Fraction(0)] * (len(w_derivative) - len(y)) + y,
+                                               [Fraction(0)] * (len(y) - len(w_derivative)) + w_derivative)])
+        factor = _exact_gcd(w, z) if any(z) else w
+        if len(factor) > 1:
+            factors.append(([float(c) for c in factor], multiplicity))
+        w = _exact_divmod(w, factor)[0]
+        y = _exact_divmod(z, factor)[0] if any(z) else [Fraction(0)]
+        multiplicity += 1
+    return factors
+
+def real_root_groups(coeffs):
+    """Real roots of a polynomial grouped by multiplicity, as a sorted list of (root, multiplicity)"""
+    coeffs = np.asarray(coeffs, dtype=float)
+    exact = np.all(coeffs == np.round(coeffs)) and np.all(np.abs(coeffs) < 2 ** 53)
+    if exact and not is_squarefree(coeffs):
+        # Multiple roots come back from the eigenvalue solver spread out by about
+        # eps**(1/multiplicity), too far to regroup reliably: factor them out exactly
+        groups = []
+        for factor, multiplicity in squarefree_factors(coeffs):
+            roots = newton_refine(factor, companion_roots(factor))
+            real = roots.real[np.abs(roots.imag) <= IMAG_TOL * (1 + np.abs(roots.real))]
+            groups += [(snap(r), multiplicity) for r in real]
+        return sorted(groups)
+
+    roots = companion_roots(coeffs)
+    roots = newton_refine(coeffs, roots)
+    real = np.sort(roots.real[np.abs(roots.imag) <= IMAG_TOL * (1 + np.abs(roots.real))])
+
+    if exact:
+        # Square-free: every root is simple, however close two of them are
+        return [(snap(r), 1) for r in real]
+
+    groups = []
+    for r in real:
+        if groups and abs(r - groups[-1][0]) <= ROOT_TOL * (1 + abs(r)):
+            root, count = groups[-1]
+            groups[-1] = (root, count + 1)
+        else:
+            groups.append((r, 1))
+    return [(snap(root), count) for root, count in groups]
+
+def deflate(coeffs, root, multiplicity=1):
+    """Divide (x - root)^multiplicity out of a polynomial by synthetic division"""
+    coeffs = [float(c) for c in coeffs]
+    for _ in range(multiplicity):
+        quotient = [coeffs[0]]
+        for c in coeffs[1:-1]:
+            quotient.append(c + root * quotient[-1])
+        coeffs = quotient
+    return np.array(coeffs)
+
+def analyze_rational(num_coeffs, den_coeffs):
+    """Find the key features of num/den numerically from coefficient lists
+
+    Returns the same feature dictionary as FunctionGenerator._analyze_function.
+    """
+    features = {
+        'vertical_asymptotes': [],
+        'horizontal_asymptote': None,
+        'oblique_asymptote': None,
+        'holes': [],
+        'x_intercepts': [],
+        'y_intercept': None
+    }
+
+    num = np.trim_zeros(np.asarray(num_coeffs, dtype=float), 'f')
+    den = np.trim_zeros(np.asarray(den_coeffs, dtype=float), 'f')
+    num_groups = real_root_groups(num)
+    den_groups = real_root_groups(den)
+
+    # Cancel roots common to numerator and denominator (tolerance-based match)
+    reduced_num, reduced_den = num, den
+    num_left = dict(num_groups)
+    den_left = {}
+    hole_candidates = []
+    for root, den_mult in den_groups:
+        match = next((r for r in num_left if abs(r - root) <= ROOT_TOL * (1 + abs(root))), None)
+        common = min(den_mult, num_left[match]) if match is not None else 0
+        if common:
+            reduced_num = deflate(reduced_num, root, common)
+            reduced_den = deflate(reduced_den, root, common)
+            num_left[match] -= common
+            if not num_left[match]:
+                del num_left[match]
+        if den_mult > common:
+            den_left[root] = den_mult - common
+        else:
+            hole_candidates.append(root)
+
+    features['vertical_asymptotes'] = sorted(den_left)
+    for root in hole_candidates:
+        features['holes'].append((root, snap(np.polyval(reduced_num, root) / np.polyval(reduced_den, root))))
+    # Zeros left over at a hole are still points where f is undefined
+    features['x_intercepts'] = sorted(
+        r for r in num_left if not any(abs(r - h) <= ROOT_TOL * (1 + abs(h)) for h in hole_candidates)
+    )
+
+    if not any(abs(root) <= ROOT_TOL for root, _ in den_groups):
+        features['y_intercept'] = snap(np.polyval(reduced_num, 0.0) / np.polyval(reduced_den, 0.0))
+
+    num_degree, den_degree = len(num) - 1, len(den) - 1
+    if num_degree < den_degree:
+        features['horizontal_asymptote'] = 0.0
+    elif num_degree == den_degree:
+        features['horizontal_asymptote'] = snap(num[0] / den[0])
+
+    return features
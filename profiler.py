@@ -0,0 +1,148 @@
+"""Operator-only, on-demand profiling of individual Streamlit reruns
+
+Off by default, with no per-rerun cost beyond one boolean check. Enable it with
+environment variables when starting the server:
+
+    GRAPHQUEST_PROFILE_RUNS=N    profile the first N reruns of every session
+    GRAPHQUEST_PROFILE_KEY=K     allow ?profile=N&profile_key=K in a session's URL
+                                 to profile that session's next N reruns
+    GRAPHQUEST_PROFILE_MODE      'sampling' (default) or 'deterministic'
+    GRAPHQUEST_PROFILE_DIR       output directory (default: profiles)
+
+Sampling mode writes collapsed stacks (.folded) for flamegraph.pl or speedscope;
+deterministic mode writes a cProfile call tree (.prof) for pstats or snakeviz.
+Each profile gets a .json sidecar with the puzzle's pattern and coefficients
+and the game state, which are also part of the file name.
+"""
+import cProfile
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+import metrics
+
+PROFILE_RUNS = int(os.environ.get('GRAPHQUEST_PROFILE_RUNS', '0') or 0)
+PROFILE_KEY = os.environ.get('GRAPHQUEST_PROFILE_KEY', '')
+PROFILE_MODE = os.environ.get('GRAPHQUEST_PROFILE_MODE', 'sampling')
+PROFILE_DIR = os.environ.get('GRAPHQUEST_PROFILE_DIR', 'profiles')
+ENABLED = bool(PROFILE_RUNS or PROFILE_KEY)
+
+SAMPLE_INTERVAL = 0.001
+RUNS_LEFT_KEY = '_profile_runs_left'
+
+_DISABLED = contextlib.nullcontext()
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread and counts collapsed stacks"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(self.stacks.values())
+
+class DeterministicProfiler:
+    """cProfile wrapper with the same start/stop/write interface"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+        return None
+
+def _arm(session_state, query_params):
+    """Set how many more reruns this session should profile"""
+    if RUNS_LEFT_KEY not in session_state:
+        session_state[RUNS_LEFT_KEY] = PROFILE_RUNS
+    # A matching key in the URL re-arms the session; drop the params so it fires once
+    if PROFILE_KEY and 'profile' in query_params:
+        if query_params.get('profile_key') == PROFILE_KEY:
+            try:
+                session_state[RUNS_LEFT_KEY] = int(query_params['profile'])
+            except ValueError:
+                pass
+        for param in ('profile', 'profile_key'):
+            if param in query_params:
+                del query_params[param]
+
+def _slug(value):
+    """File-name-safe version of a tag"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)).strip('_')
+
+@contextlib.contextmanager
+def _profiled(session_state, describe):
+    """Profile the enclosed rerun and write it with tags from describe()"""
+    profiler = DeterministicProfiler() if PROFILE_MODE == 'deterministic' else SamplingProfiler()
+    session_state[RUNS_LEFT_KEY] -= 1
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        duration = time.perf_counter() - start
+        try:
+            tags = describe()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = '_'.join(_slug(part) for part in (
+                datetime.now().strftime('%Y%m%d_%H%M%S_%f'), tags.get('session', '')[:8],
+                tags.get('game_state'), f"round{tags.get('current_round')}",
+                tags.get('pattern'), '_'.join(map(str, tags.get('params') or ()))
+            ) if part)
+            path = os.path.join(PROFILE_DIR, name + ('.prof' if PROFILE_MODE == 'deterministic' else '.folded'))
+            samples = profiler.write(path)
+            with open(os.path.join(PROFILE_DIR, name + '.json'), 'w') as f:
+                json.dump(dict(tags, duration_s=duration, samples=samples, profile=path), f, indent=2, default=str)
+        except Exception as e:
+            metrics.record_error('profiler.write')
+            print(f"Error writing profile: {e}")
+
+def capture(session_state, query_params, describe):
+    """Context manager profiling the current rerun if this session is armed, else a no-op
+
+    describe() is called after the rerun and returns the tags (puzzle, game
+    state) to record with the profile.
+    """
+    if not ENABLED:
+        return _DISABLED
+    _arm(session_state, query_params)
+    if session_state[RUNS_LEFT_KEY] <= 0:
+        return _DISABLED
+    return _profiled(session_state, describe)
@@ -0,0 +1,75 @@
+"""Compact, URL-safe codes identifying a puzzle
+
+A code is the unpadded base64url encoding of one pattern-id byte followed by
+each parameter as a zigzag varint, so small signed coefficients take one byte
+each. For example _simple_with_hole with params (-1, 3, 1) is 'AwEGAg'.
+FunctionGenerator.from_code() rebuilds the full puzzle from a code, which is
+also the key of its feature cache.
+"""
+import base64
+import re
+
+# Pattern ids are stored in codes: only ever append to this tuple
+PATTERNS = (
+    '_simple_vertical_asymptote',
+    '_simple_horizontal_asymptote',
+    '_simple_with_hole',
+    '_medium_multiple_asymptotes',
+    '_medium_with_intercepts',
+    '_medium_oblique_asymptote',
+    '_complex_multiple_features',
+    '_complex_high_degree',
+    '_complex_with_parameters',
+    '_advanced_high_degree',
+    '_custom',
+)
+PATTERN_IDS = {pattern: i + 1 for i, pattern in enumerate(PATTERNS)}
+
+MAX_CODE_LENGTH = 128
+# Parameters are small integers; longer varints mean a corrupt or crafted code
+MAX_VARINT_BYTES = 3
+
+_CODE_CHARS = re.compile(r'[A-Za-z0-9_-]+')
+
+def _zigzag(n):
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+def _unzigzag(n):
+    return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+def encode(pattern, params):
+    """The code for a pattern and its integer parameter tuple"""
+    data = bytearray([PATTERN_IDS[pattern]])
+    for value in params:
+        value = _zigzag(int(value))
+        while value >= 0x80:
+            data.append(value & 0x7f | 0x80)
+            value >>= 7
+        data.append(value)
+    return base64.urlsafe_b64encode(bytes(data)).decode('ascii').rstrip('=')
+
+def decode(code):
+    """(pattern, params) for a code; raises ValueError if it is malformed"""
+    if not isinstance(code, str) or not 0 < len(code) <= MAX_CODE_LENGTH or not _CODE_CHARS.fullmatch(code):
+        raise ValueError(f"Invalid puzzle code: {code!r}")
+    try:
+        data = base64.urlsafe_b64decode(code + '=' * (-len(code) % 4))
+    except ValueError:
+        raise ValueError(f"Invalid puzzle code: {code!r}") from None
+    if not data or not 1 <= data[0] <= len(PATTERNS):
+        raise ValueError(f"Unknown puzzle pattern in code: {code!r}")
+
+    params = []
+    value = shift = length = 0
+    for byte in data[1:]:
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        length += 1
+        if length > MAX_VARINT_BYTES:
+            raise ValueError(f"Parameter out of range in code: {code!r}")
+        if not byte & 0x80:
+            params.append(_unzigzag(value))
+            value = shift = length = 0
+    if length:
+        raise ValueError(f"Truncated puzzle code: {code!r}")
+    return PATTERNS[data[0] - 1], tuple(params)
@@ -0,0 +1,184 @@
+"""Replay recorded player sessions against app.py
+
+Usage:
+    python replay.py TRACE_FILE [--speed 1|10|max] [--processes N] [--output FILE]
+
+Reads a trace written with GRAPHQUEST_TRACE_FILE (see session_trace.py) and
+re-drives every recorded session headlessly through the real app.py, as
+load_test.py does for synthetic players. Sessions keep their recorded start
+offsets and pauses, divided by --speed ('max' removes all waits). Each game
+replays the exact recorded puzzles, so performance changes can be checked
+against real traffic shapes. Reports rerun latency per event type.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from load_test import FEATURE_INPUTS, PlayerSession
+from session_trace import load_trace
+
+GAME_STARTS = ('start', 'play_again')
+
+def queued_puzzles(events, index):
+    """The puzzles recorded for the game started at events[index]"""
+    puzzles = []
+    for event in events[index + 1:]:
+        if event['e'] in GAME_STARTS:
+            break
+        if event['e'] == 'puzzle':
+            puzzles.append(event['code'])
+    return puzzles
+
+def find_button(app, *labels):
+    """The first button whose label contains any of the given texts"""
+    return next(b for b in app.button if any(label in b.label for label in labels))
+
+def replay_session(args):
+    """Re-drive one recorded session; returns its rerun latencies and problem counts"""
+    events, speed, trace_start, wall_start = args
+    name = next((e['name'] for e in events if e['e'] == 'start'), 'replay')
+    session = PlayerSession(name, random.Random(0))
+    skipped = mismatches = 0
+
+    def wait_until(event):
+        if speed != math.inf:
+            delay = wall_start + (event['t'] - trace_start) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    wait_until(events[0])
+    session.rerun('load')
+
+    for index, event in enumerate(events):
+        kind = event['e']
+        app = session.app
+        if kind == 'puzzle':
+            if app.session_state['current_code'] != event['code']:
+                mismatches += 1
+            continue
+
+        wait_until(event)
+        try:
+            if kind in GAME_STARTS:
+                app.session_state['queued_puzzles'] = queued_puzzles(events, index)
+                if kind == 'start':
+                    # Daily Challenge and classroom games also replay as regular games: the
+                    # queued puzzles are the recorded set, whatever today's or the room's is
+                    if app.session_state['game_state'] != 'menu':
+                        # The browser reloaded into a new page with the same session id
+                        session.app = app = PlayerSession(name, session.rng).app
+                        session.rerun('load')
+                        app.session_state['queued_puzzles'] = queued_puzzles(events, index)
+                    app.text_input[0].input(event['name'])
+                    if app.checkbox:
+                        app.checkbox[0].set_value(bool(event.get('advanced')))
+                    session.rerun(kind, find_button(app, 'Start Game').click())
+                else:
+                    session.rerun(kind, find_button(app, 'Play Again').click())
+            elif kind == 'hint':
+                session.rerun(kind, app.button(key=f"hint_{event['round']}").click())
+            elif kind == 'submit':
+                for feature, key in FEATURE_INPUTS.items():
+                    app.text_input(key=f"{key}_{event['round']}").input(event['answers'][feature])
+                session.rerun(kind, app.button(key=f"submit_{event['round']}").click())
+            elif kind == 'next':
+                session.rerun(kind, app.button(key='next_round_btn').click())
+            elif kind == 'finish':
+                session.rerun(kind, app.button(key='finish_game_btn').click())
+            elif kind == 'leaderboard':
+                session.rerun(kind, find_button(app, 'Leaderboard').click())
+            elif kind == 'menu':
+                session.rerun(kind, find_button(app, 'Main Menu', 'Back to Menu').click())
+            else:
+                skipped += 1
+        except (KeyError, IndexError, StopIteration):
+            # The recording began mid-session or the UI changed; the widget isn't there
+            skipped += 1
+
+    return {'latencies': session.latencies, 'errors': session.errors, 'skipped': skipped, 'mismatches': mismatches}
+
+def run_worker(directory, session_args):
+    """Worker process: replay a group of sessions concurrently on threads"""
+    os.chdir(directory)
+    PlayerSession('warmup', random.Random(0)).rerun('load')
+    # Sessions are scheduled against this process's clock
+    wall_start = time.perf_counter()
+    session_args = [(events, speed, trace_start, wall_start) for events, speed, trace_start in session_args]
+    with ThreadPoolExecutor(max_workers=max(1, len(session_args))) as pool:
+        return list(pool.map(replay_session, session_args))
+
+def speed_factor(text):
+    """argparse type for --speed: a positive factor, or 'max' for no waits"""
+    if text == 'max':
+        return math.inf
+    try:
+        speed = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'max', not {text!r}") from None
+    if not 0 < speed < math.inf:
+        raise argparse.ArgumentTypeError(f"must be a positive number, not {text!r}")
+    return speed
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against app.py")
+    parser.add_argument('trace')
+    parser.add_argument('--speed', type=speed_factor, default=1.0,
+                        help="time compression factor, or 'max' for no waits")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    speed = args.speed
+    speed_label = 'max' if speed == math.inf else speed
+    sessions = list(load_trace(args.trace).values())
+    if not sessions:
+        print("No sessions in trace")
+        sys.exit(1)
+    trace_start = min(events[0]['t'] for events in sessions)
+    processes = max(1, min(args.processes, len(sessions)))
+    groups = [sessions[p::processes] for p in range(processes)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(run_worker, directory, [(events, speed, trace_start) for events in group])
+                for group in groups
+            ]
+            results = [r for f in futures for r in f.result()]
+        wall = time.perf_counter() - start
+
+    by_event = {}
+    for r in results:
+        for event, ms in r['latencies']:
+            by_event.setdefault(event, []).append(ms)
+    all_ms = [ms for values in by_event.values() for ms in values]
+
+    print(f"Replayed {len(sessions)} session(s), {len(all_ms)} reruns in {wall:.1f}s "
+          f"({len(all_ms) / wall:.1f} reruns/s) at speed {speed_label}")
+    print(f"{'event':<12} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for event, values in sorted(by_event.items()) + [('all', all_ms)]:
+        print(f"{event:<12} {len(values):>6} {np.percentile(values, 50):>9.1f} "
+              f"{np.percentile(values, 95):>9.1f} {np.percentile(values, 99):>9.1f}")
+    print(f"errors: {sum(r['errors'] for r in results)}  skipped events: {sum(r['skipped'] for r in results)}  "
+          f"puzzle mismatches: {sum(r['mismatches'] for r in results)}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'sessions': len(sessions), 'speed': speed_label, 'wall_s': wall,
+                'events': {event: {'count': len(v), 'p50_ms': float(np.percentile(v, 50)),
+                                   'p95_ms': float(np.percentile(v, 95)), 'p99_ms': float(np.percentile(v, 99))}
+                           for event, v in by_event.items()},
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
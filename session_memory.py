@@ -0,0 +1,187 @@
+"""Per-session memory accounting, and eviction of idle sessions' puzzles
+
+A session keeps only its current puzzle code in st.session_state; the puzzle
+itself (SymPy expressions, features, answer key) lives in a process-level
+SessionStore keyed by session id. A background sweep drops puzzles that have
+not been used for GRAPHQUEST_SESSION_IDLE_SECONDS (default 600), and the next
+rerun of that session rebuilds its puzzle from the code, which hits the
+feature cache. A tab left open then costs a few bytes instead of a puzzle.
+
+Puzzle sizes are sampled with tracemalloc: every SAMPLE_EVERY-th stored puzzle
+is queued, and the next sweep rebuilds it from its code while tracing, with
+the feature cache bypassed so the analysis is measured too. The bytes still
+allocated afterwards are recorded for its pattern. Other threads allocating
+during that window add noise, so a session's size is the median of its
+pattern's recent samples. Totals are exported as gauges, updated by every sweep:
+
+    graphquest_session_puzzles            sessions holding a puzzle
+    graphquest_session_puzzle_bytes       estimated bytes held by those puzzles
+    graphquest_session_evictions_total    puzzles dropped from idle sessions
+"""
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from statistics import median
+import metrics
+
+IDLE_TIMEOUT = float(os.environ.get('GRAPHQUEST_SESSION_IDLE_SECONDS', '600') or 600)
+SWEEP_INTERVAL = 60.0
+SAMPLE_EVERY = 20
+# Size samples kept per pattern
+SAMPLES_KEPT = 32
+
+SESSION_PUZZLES = metrics.REGISTRY.register(metrics.Gauge(
+    'graphquest_session_puzzles', 'Sessions holding a puzzle in memory'))
+SESSION_PUZZLE_BYTES = metrics.REGISTRY.register(metrics.Gauge(
+    'graphquest_session_puzzle_bytes', 'Estimated bytes held by session puzzles (sampled with tracemalloc)'))
+SESSION_EVICTIONS = metrics.REGISTRY.register(metrics.Counter(
+    'graphquest_session_evictions_total', 'Puzzles dropped from idle sessions'))
+
+_trace_lock = threading.Lock()
+
+def traced_size(build):
+    """(build(), bytes it left allocated), measured with tracemalloc"""
+    with _trace_lock:
+        # Leave tracing alone if the operator started it (e.g. PYTHONTRACEMALLOC)
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            value = build()
+            size = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            if started:
+                tracemalloc.stop()
+    return value, max(size, 0)
+
+class _Entry:
+    __slots__ = ('code', 'pattern', 'func_data', 'last_used')
+
+    def __init__(self, code, func_data, now):
+        self.code = code
+        self.pattern = func_data['pattern']
+        self.func_data = func_data
+        self.last_used = now
+
+class SessionStore:
+    """Current puzzle of each session, dropped when idle and rebuilt from its code on return"""
+
+    def __init__(self, rebuild, idle_timeout=IDLE_TIMEOUT, sample_every=SAMPLE_EVERY, cold_build=None):
+        """cold_build(code) builds a puzzle bypassing the feature cache, for size samples (default rebuild)"""
+        self.rebuild = rebuild
+        self.cold_build = cold_build or rebuild
+        self.idle_timeout = idle_timeout
+        self.sample_every = sample_every
+        self._entries = {}
+        self._samples = {}
+        self._pending = deque(maxlen=SAMPLES_KEPT)
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def put(self, session_id, func_data):
+        """Make func_data the session's current puzzle"""
+        with self._lock:
+            self._entries[session_id] = _Entry(func_data['code'], func_data, time.monotonic())
+            self._puts += 1
+            if (self._puts - 1) % self.sample_every == 0:
+                # Measured by the next sweep, off the player's request thread
+                self._pending.append((func_data['code'], func_data['pattern']))
+
+    def get(self, session_id, code):
+        """The session's puzzle for code, rebuilt if it was evicted (or never stored in this process)"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            hit = entry is not None and entry.code == code
+            if hit:
+                entry.last_used = time.monotonic()
+        metrics.record_cache('session_puzzle', hit)
+        if hit:
+            return entry.func_data
+        func_data = self.rebuild(code)
+        self.put(session_id, func_data)
+        return func_data
+
+    def peek(self, session_id):
+        """The session's stored puzzle, or None; never rebuilds and doesn't count as a use"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        return entry.func_data if entry else None
+
+    def discard(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def sample_pending(self):
+        """Measure the puzzles queued for size sampling; returns how many"""
+        with self._lock:
+            pending, self._pending = list(self._pending), deque(maxlen=SAMPLES_KEPT)
+        for code, pattern in pending:
+            self._sample(code, pattern)
+        return len(pending)
+
+    def _sample(self, code, pattern):
+        try:
+            _, size = traced_size(lambda: self.cold_build(code))
+        except Exception as e:
+            metrics.record_error('session_memory.sample')
+            print(f"Error sampling puzzle size: {e}")
+            return
+        with self._lock:
+            self._samples.setdefault(pattern, deque(maxlen=SAMPLES_KEPT)).append(size)
+
+    def estimated_size(self, pattern):
+        """Median sampled bytes of a puzzle of this pattern (of any pattern if none sampled yet)"""
+        with self._lock:
+            samples = self._samples.get(pattern) or [s for kept in self._samples.values() for s in kept]
+            return median(samples) if samples else 0
+
+    def session_bytes(self, session_id):
+        """Estimated bytes held for one session"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        return self.estimated_size(entry.pattern) if entry else 0
+
+    def evict_idle(self, now=None):
+        """Drop puzzles unused for idle_timeout seconds; returns how many"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [sid for sid, entry in self._entries.items() if now - entry.last_used > self.idle_timeout]
+            for session_id in idle:
+                del self._entries[session_id]
+        SESSION_EVICTIONS.inc(len(idle))
+        self.update_gauges()
+        return len(idle)
+
+    def usage(self):
+        """{'sessions': n, 'bytes': estimated total} over sessions holding a puzzle"""
+        with self._lock:
+            patterns = [entry.pattern for entry in self._entries.values()]
+        sizes = {pattern: self.estimated_size(pattern) for pattern in set(patterns)}
+        return {'sessions': len(patterns), 'bytes': sum(sizes[pattern] for pattern in patterns)}
+
+    def update_gauges(self):
+        usage = self.usage()
+        SESSION_PUZZLES.set(usage['sessions'])
+        SESSION_PUZZLE_BYTES.set(usage['bytes'])
+
+def _start_timer(delay, function, *args):
+    timer = threading.Timer(delay, function, args)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+def schedule_sweeps(store, interval=SWEEP_INTERVAL):
+    """Sample queued puzzle sizes and evict idle sessions' puzzles every interval seconds"""
+    def sweep():
+        try:
+            store.sample_pending()
+            store.evict_idle()
+        except Exception as e:
+            metrics.record_error('session_memory.sweep')
+            print(f"Error evicting idle sessions: {e}")
+        _start_timer(interval, sweep)
+
+    return _start_timer(interval, sweep)
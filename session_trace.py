@@ -0,0 +1,61 @@
+"""Opt-in recording of player sessions to a compact append-only trace
+
+Set GRAPHQUEST_TRACE_FILE=/path/sessions.trace when starting the server to
+record, per session, every state transition with its inputs (typed answers,
+hints) and the code of each generated puzzle (see puzzle_codec.py). Each event is one line
+of compact JSON:
+
+    {"s":"3f2a9c1e","t":1729320000.123,"e":"submit","round":2,"answers":{...}}
+
+replay.py re-drives recorded sessions against app.py at 1x, 10x or max speed.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+TRACE_FILE = os.environ.get('GRAPHQUEST_TRACE_FILE', '')
+ENABLED = bool(TRACE_FILE)
+
+_lock = threading.Lock()
+_file = None
+
+def _session_key(session_id):
+    """Short, stable, non-reversible id for a Streamlit session"""
+    return hashlib.sha1(str(session_id).encode()).hexdigest()[:8]
+
+def record(session_id, event, **data):
+    """Append one event for a session; a no-op unless tracing is enabled"""
+    global _file
+    if not ENABLED:
+        return
+    line = json.dumps(
+        {'s': _session_key(session_id), 't': round(time.time(), 3), 'e': event, **data},
+        separators=(',', ':'), default=list
+    )
+    try:
+        with _lock:
+            if _file is None:
+                _file = open(TRACE_FILE, 'a', buffering=1)
+            _file.write(line + '\n')
+    except Exception as e:
+        print(f"Error writing trace: {e}")
+
+def load_trace(filename):
+    """Read a trace file into {session key: [events in time order]}"""
+    sessions = {}
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash; everything before it is intact
+                continue
+            sessions.setdefault(event['s'], []).append(event)
+    for events in sessions.values():
+        events.sort(key=lambda event: event['t'])
+    return sessions
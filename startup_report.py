@@ -0,0 +1,78 @@
+"""Import-time and first-request latency report
+
+Usage:
+    python startup_report.py [--runs N]
+
+Each measurement runs in a fresh interpreter so module caches and SymPy's
+one-off initialisation are cold, exactly as for the first player after a
+server start. Reports, as the median of N runs:
+  - import time of each module
+  - latency of the first puzzle per difficulty without warm-up
+  - the same latency after FunctionGenerator.warm_up()
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ('app', 'game_logic', 'function_generator', 'database')
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps(time.perf_counter() - start))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import json, random, time
+from function_generator import FunctionGenerator, DIFFICULTY_PATTERNS
+start = time.perf_counter()
+func_gen = FunctionGenerator()
+timings = {{'init': time.perf_counter() - start}}
+if {warm}:
+    start = time.perf_counter()
+    func_gen.warm_up()
+    timings['warm_up'] = time.perf_counter() - start
+random.seed(0)
+for difficulty in DIFFICULTY_PATTERNS:
+    start = time.perf_counter()
+    func_gen.generate_function(difficulty)
+    timings[f'difficulty_{{difficulty}}'] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+def run_snippet(code):
+    """Run code in a fresh interpreter and return the JSON it prints last"""
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def median_of_runs(code, runs):
+    """Median of each timing over several fresh-interpreter runs"""
+    samples = [run_snippet(code) for _ in range(runs)]
+    if isinstance(samples[0], dict):
+        return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and first-request latency report")
+    parser.add_argument('--runs', type=int, default=3, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    print("Import time (fresh interpreter)")
+    for module in MODULES:
+        seconds = median_of_runs(IMPORT_SNIPPET.format(module=module), args.runs)
+        print(f"  {module:<20} {seconds * 1000:8.1f} ms")
+
+    cold = median_of_runs(FIRST_REQUEST_SNIPPET.format(warm=False), args.runs)
+    warm = median_of_runs(FIRST_REQUEST_SNIPPET.format(warm=True), args.runs)
+
+    print("First-request latency")
+    print(f"  {'step':<20} {'cold ms':>9} {'warm ms':>9}")
+    for key in cold:
+        print(f"  {key:<20} {cold[key] * 1000:9.1f} {warm[key] * 1000:9.1f}")
+    print(f"  {'warm_up':<20} {'-':>9} {warm['warm_up'] * 1000:9.1f}")
+
+if __name__ == "__main__":
+    main()
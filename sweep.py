@@ -0,0 +1,242 @@
+"""Exhaustive differential check of feature analysis over every indexed puzzle
+
+Usage:
+    python sweep.py [--patterns P1,P2] [--processes N] [--numeric] [--limit N] [--output FILE]
+
+Builds every valid parameter tuple of every pattern in PARAMETER_SPACES, in
+parallel across worker processes, and cross-checks the features produced by
+_analyze_function against an independent floating-point evaluation of the
+original numerator/denominator:
+
+- no NaN/inf values, duplicate entries, or x values both a hole and a VA
+- every real denominator root is reported, as a VA if |f| blows up next to it
+  or as a hole whose value matches the numeric limit
+- x-intercepts are exactly the real roots where f is defined and zero
+- the horizontal asymptote matches f far from the origin
+- the y-intercept matches f(0), and is absent where f(0) is undefined
+- f keeps its sign between consecutive reported features, so no root or
+  odd-order pole is missing
+
+--numeric also runs numeric_analysis.analyze_rational on the same coefficients
+and checks it the same way. Reports mismatches and per-pattern throughput, and
+exits non-zero if any check fails.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from function_generator import PARAMETER_SPACES
+
+CHUNK_SIZE = 50
+ROOT_TOL = 1e-6
+VALUE_TOL = 1e-4
+# Offsets used to probe f either side of a root, and the far-field point for asymptotes
+NEAR = 1e-6
+FAR = 1e7
+BLOW_UP = 1e4
+SIGN_SAMPLES = 7
+
+_func_gen = None
+
+def _init_worker():
+    global _func_gen
+    from function_generator import FunctionGenerator
+    _func_gen = FunctionGenerator()
+
+def real_roots(coeffs):
+    """Distinct real roots of a polynomial (repeated roots merged)"""
+    coeffs = np.trim_zeros(coeffs, 'f')
+    if len(coeffs) < 2:
+        return []
+    roots = sorted(r.real for r in np.roots(coeffs) if abs(r.imag) < 1e-5 * (1 + abs(r)))
+    distinct = []
+    for r in roots:
+        # Repeated roots come back spread by about sqrt(machine epsilon)
+        if distinct and abs(r - distinct[-1]) < 1e-4 * (1 + abs(r)):
+            continue
+        distinct.append(r)
+    return distinct
+
+def evaluate(num, den, x):
+    """f(x) in floating point"""
+    return np.polyval(num, x) / np.polyval(den, x)
+
+def near(a, b, tol=VALUE_TOL):
+    return abs(a - b) <= tol * (1 + abs(b))
+
+def check_features(features, num, den):
+    """Compare one feature dict with an independent evaluation; returns a list of problems"""
+    problems = []
+    vas = list(features['vertical_asymptotes'])
+    holes = list(features['holes'])
+    x_ints = list(features['x_intercepts'])
+    ha = features['horizontal_asymptote']
+    y_int = features['y_intercept']
+
+    values = vas + [v for hole in holes for v in hole] + x_ints
+    values += [v for v in (ha, y_int) if v is not None]
+    if not all(math.isfinite(v) for v in values):
+        problems.append(f"non-finite value in {features}")
+        return problems
+    for name, xs in (('vertical asymptote', vas), ('hole', [h[0] for h in holes]), ('x-intercept', x_ints)):
+        if len(xs) != len({round(x, 9) for x in xs}):
+            problems.append(f"duplicate {name}: {xs}")
+    if {round(x, 9) for x in vas} & {round(h[0], 9) for h in holes}:
+        problems.append(f"x is both a hole and a VA: {vas} / {holes}")
+
+    # Denominator roots: pole or removable?
+    den_roots = real_roots(den)
+    for r in den_roots:
+        left, right = evaluate(num, den, r - NEAR), evaluate(num, den, r + NEAR)
+        if max(abs(left), abs(right)) > BLOW_UP:
+            if not any(near(v, r, ROOT_TOL) for v in vas):
+                problems.append(f"missing vertical asymptote x={r:g}")
+        else:
+            limit = (left + right) / 2
+            match = [h for h in holes if near(h[0], r, ROOT_TOL)]
+            if not match:
+                problems.append(f"missing hole x={r:g} (limit {limit:g})")
+            elif not near(match[0][1], limit):
+                problems.append(f"hole at x={r:g} has y={match[0][1]:g}, limit is {limit:g}")
+    for x in vas + [h[0] for h in holes]:
+        if not any(near(x, r, ROOT_TOL) for r in den_roots):
+            problems.append(f"reported VA/hole x={x:g} is not a denominator root")
+
+    def defined(x):
+        return not any(near(x, r, ROOT_TOL) for r in den_roots)
+
+    # Zeros of f: numerator roots where the function is defined
+    expected = [r for r in real_roots(num) if defined(r)]
+    for r in expected:
+        if not any(near(x, r, ROOT_TOL) for x in x_ints):
+            problems.append(f"missing x-intercept x={r:g}")
+    for x in x_ints:
+        if not defined(x):
+            problems.append(f"x-intercept x={x:g} where f is undefined")
+        elif not any(near(x, r, ROOT_TOL) for r in expected):
+            problems.append(f"x-intercept x={x:g} is not a root (f={evaluate(num, den, x):g})")
+
+    # Behaviour far from the origin
+    far = [evaluate(num, den, FAR), evaluate(num, den, -FAR)]
+    if ha is None:
+        if max(abs(v) for v in far) < BLOW_UP:
+            problems.append(f"no horizontal asymptote reported, but f tends to {far[0]:g}")
+    elif not all(near(v, ha, 1e-3) for v in far):
+        problems.append(f"horizontal asymptote y={ha:g}, but f(+-{FAR:g}) = {far[0]:g}, {far[1]:g}")
+
+    if defined(0.0):
+        if y_int is None:
+            problems.append("missing y-intercept")
+        elif not near(y_int, evaluate(num, den, 0.0)):
+            problems.append(f"y-intercept {y_int:g}, f(0) = {evaluate(num, den, 0.0):g}")
+    elif y_int is not None:
+        problems.append(f"y-intercept {y_int:g} reported where f(0) is undefined")
+
+    # Sign changes must happen at a reported zero or pole
+    breaks = sorted(set(vas + x_ints + [h[0] for h in holes]))
+    edges = [min(breaks, default=0.0) - 10] + breaks + [max(breaks, default=0.0) + 10]
+    for lo, hi in zip(edges, edges[1:]):
+        xs = np.linspace(lo, hi, SIGN_SAMPLES + 2)[1:-1]
+        signs = {s for s in np.sign(evaluate(num, den, xs)) if s}
+        if len(signs) > 1:
+            problems.append(f"f changes sign on ({lo:g}, {hi:g}) with no reported zero or pole there")
+    return problems
+
+def sweep_chunk(args):
+    """Build and check one chunk of parameter tuples of a pattern"""
+    pattern, chunk, numeric = args
+    from sympy import Poly
+    from numeric_analysis import analyze_rational
+    x = _func_gen.x
+    result = {'pattern': pattern, 'count': 0, 'build_s': 0.0, 'numeric_s': 0.0, 'mismatches': []}
+
+    for params in chunk:
+        start = time.perf_counter()
+        try:
+            func_data = _func_gen.build_function(pattern, params)
+        except Exception as e:
+            result['mismatches'].append((pattern, params, 'sympy', [f"build failed: {e}"]))
+            continue
+        result['build_s'] += time.perf_counter() - start
+        result['count'] += 1
+
+        num = np.array(Poly(func_data['original_numerator'], x).all_coeffs(), dtype=float)
+        den = np.array(Poly(func_data['original_denominator'], x).all_coeffs(), dtype=float)
+        engines = [('sympy', func_data['features'])]
+        if numeric:
+            start = time.perf_counter()
+            engines.append(('numeric', analyze_rational(num, den)))
+            result['numeric_s'] += time.perf_counter() - start
+
+        for engine, features in engines:
+            problems = check_features(features, num, den)
+            if problems:
+                result['mismatches'].append((pattern, params, engine, problems))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Check feature analysis on every indexed puzzle")
+    parser.add_argument('--patterns', help="comma-separated patterns (default: all indexed patterns)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--numeric', action='store_true', help="also check the numeric analysis engine")
+    parser.add_argument('--limit', type=int, help="check at most N tuples per pattern")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    from function_generator import build_parameter_index
+    index = build_parameter_index()
+    patterns = args.patterns.split(',') if args.patterns else list(PARAMETER_SPACES)
+    unknown = [p for p in patterns if p not in index]
+    if unknown:
+        print(f"Unknown or unindexed pattern(s): {', '.join(unknown)}")
+        sys.exit(2)
+
+    jobs = []
+    for pattern in patterns:
+        tuples = index[pattern][0][:args.limit]
+        jobs += [(pattern, tuples[i:i + CHUNK_SIZE], args.numeric) for i in range(0, len(tuples), CHUNK_SIZE)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.processes), initializer=_init_worker) as pool:
+        chunks = list(pool.map(sweep_chunk, jobs))
+    wall = time.perf_counter() - start
+
+    summary = {p: {'count': 0, 'build_s': 0.0, 'numeric_s': 0.0, 'mismatches': 0} for p in patterns}
+    mismatches = []
+    for chunk in chunks:
+        row = summary[chunk['pattern']]
+        for key in ('count', 'build_s', 'numeric_s'):
+            row[key] += chunk[key]
+        row['mismatches'] += len(chunk['mismatches'])
+        mismatches += chunk['mismatches']
+
+    for pattern, params, engine, problems in mismatches:
+        print(f"MISMATCH {pattern}{tuple(params)} [{engine}]: {'; '.join(problems)}")
+
+    print(f"{'pattern':<30} {'tuples':>7} {'build/s':>9} {'numeric/s':>10} {'mismatches':>10}")
+    for pattern, row in summary.items():
+        build_rate = row['count'] / row['build_s'] if row['build_s'] else 0.0
+        numeric_rate = row['count'] / row['numeric_s'] if row['numeric_s'] else 0.0
+        print(f"{pattern:<30} {row['count']:>7} {build_rate:>9.1f} {numeric_rate:>10.1f} {row['mismatches']:>10}")
+    total = sum(row['count'] for row in summary.values())
+    print(f"Checked {total} puzzles in {wall:.1f}s ({total / wall:.1f}/s), {len(mismatches)} mismatch(es)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'wall_s': wall,
+                'patterns': summary,
+                'mismatches': [{'pattern': p, 'params': list(params), 'engine': e, 'problems': problems}
+                               for p, params, e, problems in mismatches],
+            }, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
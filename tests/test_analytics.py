@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from analytics import AttemptStore
+from game_logic import FEATURES
+
+CODES = ['AwEGAg', 'AQEC', 'BAECAwQ']
+
+@pytest.fixture
+def store(tmp_path):
+    """A store with five flushed chunks of rows at fractional times in [1000, 1050)"""
+    store = AttemptStore(str(tmp_path), chunk_rows=10**6, flush_interval=3600)
+    rng = random.Random(0)
+    rows = []
+    for chunk in range(5):
+        for _ in range(40):
+            row = (1000 + chunk * 10 + rng.random() * 9.5, rng.choice(CODES), rng.randint(1, 4),
+                   rng.randint(1, 5), rng.randint(0, 3), rng.randrange(0, 501, 100),
+                   {f: rng.random() < 0.5 for f in FEATURES})
+            store.record(*row[1:], now=row[0])
+            rows.append(row)
+        store.flush()
+    store.rows = rows
+    yield store
+    store.flush()
+
+@pytest.mark.parametrize('since', [None, 0, 1000, 1004.5, 1009.75, 1010, 1029.9999, 1049.5, 1100])
+def test_load_returns_exactly_the_rows_since(store, since):
+    expected = sorted(t for t, *_ in store.rows if since is None or t >= since)
+    assert sorted(store.load(['time'], since)['time'].tolist()) == expected
+
+@pytest.mark.parametrize('since', [None, 1000, 1004.5, 1015.25, 1049.5])
+@pytest.mark.parametrize('by', ['difficulty', 'round', 'hints'])
+def test_group_counts_match_a_brute_force_count(store, since, by):
+    column = {'difficulty': 2, 'round': 3, 'hints': 4}[by]
+    expected = np.zeros((len(FEATURES) + 1, 256), dtype=np.int64)
+    for row in store.rows:
+        if since is None or row[0] >= since:
+            expected[0, row[column]] += 1
+            for i, feature in enumerate(FEATURES, 1):
+                expected[i, row[column]] += row[6][feature]
+    # Twice, so the second call reads the cached counts of whole chunks
+    for _ in range(2):
+        assert (store.group_counts(by, since) == expected).all()
+
+def test_chunk_files_skip_only_chunks_entirely_before_since(store):
+    assert len(store.chunk_files()) == 5
+    # Chunk 1's rows lie in [1010, 1019.5), so its name (widened to whole seconds) ends at 1020
+    assert len(store.chunk_files(1019.9)) == 4
+    assert len(store.chunk_files(1020.5)) == 3
+    assert store.chunk_files(1100) == []
+
+def test_compact_keeps_every_row(store):
+    before = sorted(store.load(['time'])['time'].tolist())
+    assert store.compact() == 5
+    assert len(store.chunk_files()) == 1
+    assert sorted(store.load(['time'])['time'].tolist()) == before
@@ -0,0 +1,44 @@
+from fractions import Fraction
+
+import pytest
+
+from answer_key import (MAX_EXPONENT, MAX_NUMBER_LENGTH, AnswerKey, parse_float, parse_number,
+                        parse_numbers, to_fraction)
+
+@pytest.mark.parametrize('text, expected', [
+    ('-2', Fraction(-2)), ('0.25', Fraction(1, 4)), ('1/3', Fraction(1, 3)), ('-.5', Fraction(-1, 2)),
+    (' 3 ', Fraction(3)), ('2e3', Fraction(2000)), (f'1e-{MAX_EXPONENT}', Fraction(1, 10**MAX_EXPONENT)),
+])
+def test_parse_number_is_exact(text, expected):
+    assert parse_number(text) == expected
+    assert parse_float(text) == pytest.approx(float(expected))
+
+@pytest.mark.parametrize('text', [
+    '', 'abc', '1/2/3', '1/', '--1', '0x10', 'nan', 'inf', '1_000',
+    '1' * (MAX_NUMBER_LENGTH + 1), f'1e{MAX_EXPONENT + 1}', f'1e-{MAX_EXPONENT + 1}', '9e999999999',
+])
+def test_parse_number_rejects(text):
+    with pytest.raises(ValueError):
+        parse_number(text)
+    with pytest.raises(ValueError):
+        parse_float(text)
+
+def test_parse_numbers_ignores_malformed_lists():
+    assert parse_numbers('1, -2, 1/2') == (1, -2, Fraction(1, 2))
+    assert parse_numbers('none') == parse_numbers('') == parse_numbers('1, x') == parse_numbers('1/0') == ()
+
+def test_to_fraction_snaps_float_noise():
+    assert to_fraction(0.8333333333333334) == Fraction(5, 6)
+    assert to_fraction(0.1) == Fraction(1, 10)
+
+def test_answer_key_matches():
+    key = AnswerKey({'vertical_asymptotes': [-3.0, 1 / 3], 'horizontal_asymptote': None,
+                     'holes': [(2.0, 0.5)], 'x_intercepts': [], 'y_intercept': 0.8333333333333334})
+    assert key.vertical_asymptotes.matches('1/3, -3')
+    assert key.vertical_asymptotes.matches('-3.0009, 0.3333')
+    assert not key.vertical_asymptotes.matches('-3, -3')
+    assert not key.vertical_asymptotes.matches('-3, 1/3, 4')
+    assert key.horizontal_asymptote.matches('None')
+    assert key.holes.matches('2') and not key.holes.matches('0.5')
+    assert key.x_intercepts.matches('none') and not key.x_intercepts.matches('0')
+    assert key.y_intercept.matches('5/6') and not key.y_intercept.matches('0.832')
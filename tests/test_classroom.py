@@ -0,0 +1,60 @@
+import random
+import threading
+
+from classroom import ROOM_ROUNDS, Standings
+
+def check_order(standings, players, scores):
+    """Snapshot rows and ranks agree with a from-scratch sort by score"""
+    rows = standings.snapshot().rows
+    assert [row[2] for row in rows] == sorted(scores.values(), reverse=True)
+    assert sorted(row[1] for row in rows) == sorted(f'player{p}' for p in players)
+    for player in players:
+        rank = standings.rank(str(player))
+        assert rows[rank - 1][1] == f'player{player}'
+
+def test_concurrent_submits_keep_rank_order():
+    standings = Standings(max_players=64)
+    players = range(64)
+    scores = {p: 0 for p in players}
+    barrier = threading.Barrier(len(players))
+
+    def play(player):
+        rng = random.Random(player)
+        standings.join(str(player), f'player{player}')
+        barrier.wait()
+        for round_number in range(1, ROOM_ROUNDS + 1):
+            points = rng.randrange(0, 501, 10)
+            assert standings.submit(str(player), round_number, points)
+            # A second submission for the same round never counts
+            assert not standings.submit(str(player), round_number, 500)
+            scores[player] += points
+            standings.snapshot()
+
+    threads = [threading.Thread(target=play, args=(p,)) for p in players]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    check_order(standings, players, scores)
+    assert standings.version == len(players) * (ROOM_ROUNDS + 1)
+    assert all(row[3] == f'{ROOM_ROUNDS}/{ROOM_ROUNDS}' for row in standings.snapshot().rows)
+
+def test_ties_rank_whoever_reached_the_score_first():
+    standings = Standings()
+    for player in range(3):
+        standings.join(str(player), f'player{player}', now=0)
+    standings.submit('2', 1, 100, now=1)
+    standings.submit('0', 1, 100, now=2)
+    assert [row[1] for row in standings.snapshot().rows] == ['player2', 'player0', 'player1']
+    assert standings.rank('1') == 3
+
+def test_join_reuses_entries_and_respects_the_limit():
+    standings = Standings(max_players=2)
+    assert standings.join('a', 'Ana')
+    assert standings.join('b', 'Ben')
+    assert standings.join('a', 'Ana')
+    assert not standings.join('c', 'Cy')
+    assert len(standings) == 2
+    assert not standings.submit('c', 1, 100)
+    assert standings.rank('c') is None
@@ -0,0 +1,64 @@
+import pytest
+
+import custom_puzzle
+import puzzle_codec
+from custom_puzzle import MAX_COEFFICIENT, MAX_DEGREE, MAX_INPUT_LENGTH
+
+@pytest.mark.parametrize('text, expected', [
+    ('(2x+2)/(4x^2-4)', ((1, 1), (2, 0, -2))),
+    ('(x-1)/(-x+2)', ((-1, 1), (1, -2))),
+    ('f(x) = 3/(x^2)', ((3,), (1, 0, 0))),
+    ('y=(x-1)(x+2)/(x^2-4)', ((1, 1, -2), (1, 0, -4))),
+    ('6x**2/9', ((2, 0, 0), (3,))),
+])
+def test_parse_normalizes(text, expected):
+    assert custom_puzzle.parse(text) == expected
+
+def test_normalize_divides_out_the_gcd_and_fixes_the_sign():
+    assert custom_puzzle.normalize([4, -6], [-2, 0, 8]) == ([-2, 3], [1, 0, -4])
+    assert custom_puzzle.normalize([1], [1, 1]) == ([1], [1, 1])
+
+@pytest.mark.parametrize('text', [
+    '',
+    '   ',
+    'x' * (MAX_INPUT_LENGTH + 1),
+    f'x^{MAX_DEGREE + 1}/(x-1)',
+    f'1/x^{MAX_DEGREE + 1}',
+    f'{MAX_COEFFICIENT + 1}/(x-1)',
+    f'(x+{MAX_COEFFICIENT})^2/(x-1)',
+    '1/0',
+    '0/(x-1)',
+    '((x-1) - (x-1))/(x+1)',
+    '(x-1',
+    'sin(x)',
+    '1/(x-1)/(x+1)',
+])
+def test_parse_rejects(text):
+    with pytest.raises(ValueError):
+        custom_puzzle.parse(text)
+
+def test_params_round_trip_through_a_code():
+    numerator, denominator = custom_puzzle.parse('(x-1)(x+2)/(x^2-4)')
+    pattern, params = puzzle_codec.decode(custom_puzzle.puzzle_code('(x-1)(x+2)/(x^2-4)'))
+    assert pattern == custom_puzzle.CUSTOM_PATTERN
+    assert custom_puzzle.from_params(params) == (numerator, denominator)
+
+@pytest.mark.parametrize('params', [
+    (),
+    (MAX_DEGREE + 1, *[1] * (MAX_DEGREE + 2), 1),
+    (1, 2, 2, 2, 2),            # not divided by the common factor 2
+    (0, 1, -1, 1),              # negative leading denominator coefficient
+    (0, 0, 1),                  # zero numerator
+    (0, 1, MAX_COEFFICIENT + 1),
+    (1, 1, 1),                  # missing denominator
+])
+def test_from_params_rejects(params):
+    with pytest.raises(ValueError):
+        custom_puzzle.from_params(params)
+
+def test_token_bucket():
+    state = {}
+    assert all(custom_puzzle.take_token(state, 3, 1.0, now=0.0) for _ in range(3))
+    assert not custom_puzzle.take_token(state, 3, 1.0, now=0.5)
+    assert custom_puzzle.take_token(state, 3, 1.0, now=1.5)
+    assert not custom_puzzle.take_token(state, 3, 1.0, now=1.6)
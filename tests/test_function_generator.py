@@ -0,0 +1,33 @@
+import random
+
+import puzzle_codec
+from function_generator import DIFFICULTY_PATTERNS, FunctionGenerator
+
+def all_codes(func_gen, pattern):
+    return [puzzle_codec.encode(pattern, params) for params in func_gen.parameter_index[pattern][0]]
+
+def test_a_game_never_repeats_a_puzzle():
+    func_gen = FunctionGenerator()
+    rng = random.Random(0)
+    for difficulty in (1, 2, 3):
+        seen = []
+        for _ in range(60):
+            seen.append(func_gen.generate_function(difficulty, exclude=seen, rng=rng)['code'])
+        assert len(set(seen)) == len(seen)
+
+def test_excluded_puzzles_are_never_drawn():
+    func_gen = FunctionGenerator()
+    rng = random.Random(1)
+    # All but one puzzle of the smallest space, plus codes of other difficulties and a custom code
+    small = all_codes(func_gen, '_complex_with_parameters')
+    exclude = small[1:] + all_codes(func_gen, '_simple_vertical_asymptote')[:5] + ['CwEBAQIB']
+    for _ in range(200):
+        code = func_gen.generate_function(3, exclude=exclude, rng=rng)['code']
+        assert code not in exclude
+
+def test_exhausted_pattern_gives_way_to_the_others():
+    func_gen = FunctionGenerator()
+    rng = random.Random(2)
+    exclude = all_codes(func_gen, '_simple_vertical_asymptote')
+    patterns = {func_gen.generate_function(1, exclude=exclude, rng=rng)['pattern'] for _ in range(100)}
+    assert patterns == set(DIFFICULTY_PATTERNS[1]) - {'_simple_vertical_asymptote'}
@@ -0,0 +1,68 @@
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from answer_key import TOLERANCE
+from function_generator import FunctionGenerator
+from game_logic import FEATURES, LIST_FEATURES, GameLogic
+
+@pytest.fixture(scope='module')
+def puzzles():
+    func_gen = FunctionGenerator()
+    rng = random.Random(0)
+    return [func_gen.generate_function(difficulty, rng=rng) for difficulty in (1, 1, 2, 2, 3, 3, 4, 4)]
+
+def feature_values(func_data, feature):
+    value = func_data['features'][feature]
+    if feature == 'holes':
+        return [hole[0] for hole in value]
+    return value
+
+def candidate_answers(values, is_list):
+    """Right, wrong, boundary and malformed answers for one feature"""
+    answers = ['none', 'undefined', '', '0', '1', '-2, 2', 'abc', '1/0', '1e999', ' 3 ', '2/3']
+    if is_list:
+        values = list(values)
+        answers += [', '.join(map(str, values)), ', '.join(map(str, reversed(values))),
+                    ', '.join(map(str, values + values[:1])), ', '.join(map(str, values[1:]))]
+        offsets = [(v, d) for v in values for d in (0.0, 0.5, 0.999, 1.0, 1.001, -1.0)]
+        for value, d in offsets:
+            shifted = values[:]
+            shifted[values.index(value)] = value + d * TOLERANCE
+            answers.append(', '.join(map(str, shifted)))
+        answers += [str(Fraction(v).limit_denominator(1000)) for v in values]
+    elif values is not None:
+        answers += [str(values + d * TOLERANCE) for d in (0.0, 0.5, 0.999, 1.0, 1.001, -1.0, -0.999)]
+        answers.append(str(Fraction(values).limit_denominator(1000)))
+    return answers
+
+def test_batch_matches_check_answers(puzzles):
+    logic = GameLogic()
+    rng = random.Random(1)
+    candidates = [{f: candidate_answers(feature_values(p, f), f in LIST_FEATURES) for f in FEATURES}
+                  for p in puzzles]
+    puzzle_index = [rng.randrange(len(puzzles)) for _ in range(600)]
+    submissions = {f: [rng.choice(candidates[i][f]) for i in puzzle_index] for f in FEATURES}
+
+    scores, correctness = logic.check_answers_batch(puzzles, submissions, puzzle_index)
+
+    for row, i in enumerate(puzzle_index):
+        score, feedback = logic.check_answers(puzzles[i], {f: submissions[f][row] for f in FEATURES})
+        assert scores[row] == score
+        for feature in FEATURES:
+            assert correctness[feature][row] == feedback[feature]['correct'], (feature, submissions[feature][row])
+
+def test_batch_defaults_to_first_puzzle(puzzles):
+    logic = GameLogic()
+    answers = {f: [candidate_answers(feature_values(puzzles[0], f), f in LIST_FEATURES)[-1], 'none'] for f in FEATURES}
+    scores, _ = logic.check_answers_batch(puzzles[0], answers)
+    expected = [logic.check_answers(puzzles[0], {f: answers[f][row] for f in FEATURES})[0] for row in range(2)]
+    assert scores.tolist() == expected
+
+@pytest.mark.parametrize('puzzle_index', [[0, 8], [-1, 0], [0.5, 1], [0]])
+def test_batch_rejects_bad_puzzle_index(puzzles, puzzle_index):
+    submissions = {f: ['none', 'none'] for f in FEATURES}
+    with pytest.raises(ValueError):
+        GameLogic().check_answers_batch(puzzles, submissions, np.array(puzzle_index))
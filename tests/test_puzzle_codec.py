@@ -0,0 +1,36 @@
+import pytest
+
+import puzzle_codec
+from function_generator import FunctionGenerator, build_parameter_index
+
+def test_docstring_example():
+    assert puzzle_codec.encode('_simple_with_hole', (-1, 3, 1)) == 'AwEGAg'
+    assert puzzle_codec.decode('AwEGAg') == ('_simple_with_hole', (-1, 3, 1))
+
+def test_round_trips_every_indexed_puzzle():
+    for pattern, (tuples, _) in build_parameter_index().items():
+        for params in tuples:
+            assert puzzle_codec.decode(puzzle_codec.encode(pattern, params)) == (pattern, params)
+
+@pytest.mark.parametrize('params', [(), (0,), (63, -64, 64, -65), (10000, -10000), (2**20 - 1, -2**20)])
+def test_round_trips_extreme_parameters(params):
+    for pattern in puzzle_codec.PATTERNS:
+        assert puzzle_codec.decode(puzzle_codec.encode(pattern, params)) == (pattern, params)
+
+@pytest.mark.parametrize('code', [
+    '', None, 'A' * (puzzle_codec.MAX_CODE_LENGTH + 1), 'Aw==', 'Aw E', 'AwE!', 'A',
+    # Pattern id 0 and one past the last pattern
+    'AA', 'DA',
+    # Truncated varint and a varint longer than MAX_VARINT_BYTES
+    'A4A', 'A_____8',
+])
+def test_rejects_malformed_codes(code):
+    with pytest.raises(ValueError):
+        puzzle_codec.decode(code)
+
+def test_from_code_rebuilds_the_puzzle():
+    func_gen = FunctionGenerator()
+    func_data = func_gen.build_function('_simple_with_hole', (-1, 3, 1))
+    rebuilt = func_gen.from_code(func_data['code'])
+    assert (rebuilt['pattern'], rebuilt['params'], rebuilt['features']) == \
+        (func_data['pattern'], func_data['params'], func_data['features'])